@@ -1,55 +1,96 @@
 import sys, os, random, pygame
-sys.path.append(os.path.join("objects"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "objects"))
 import SudokuSquare
 from utils import *
 from GameResources import *
 
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+BOARD_SIZE = (700, 700)
+BACKGROUND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images", "sudoku-board-bare.jpg")
+
+
+def square_position(x, y):
+    """Return the pixel offset of the square in column x and row y of the board image """
+    if x in (0, 1, 2):  startX = (x * 57) + 38
+    if x in (3, 4, 5):  startX = (x * 57) + 99
+    if x in (6, 7, 8):  startX = (x * 57) + 159
+
+    if y in (0, 1, 2):  startY = (y * 57) + 35
+    if y in (3, 4, 5):  startY = (y * 57) + 100
+    if y in (6, 7, 8):  startY = (y * 57) + 165
+    return startX, startY
+
+
+def square_number(value):
+    """Return the number shown for a box value, or None if the box is unsolved """
+    if len(value) > 1 or value == '' or value == '.':
+        return None
+    return int(value)
+
+
+class Board:
+    """The rendered board: the background and the 81 squares are created once,
+    and `update` redraws only the square of the box that changed.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    surface(pygame.Surface)
+        the surface to draw on; the display surface if not given
+    """
+    def __init__(self, values, surface=None):
+        self.surface = surface if surface is not None else pygame.display.get_surface()
+        background = pygame.image.load(BACKGROUND)
+        self.background = background.convert() if pygame.display.get_surface() else background
+        self.squares = {}
+        for y in range(9):
+            for x in range(9):
+                startX, startY = square_position(x, y)
+                box = rows[y] + cols[x]
+                self.squares[box] = SudokuSquare.SudokuSquare(
+                    square_number(values[box]), startX, startY, "N", x, y, surface=self.surface)
+
+    def draw(self):
+        """Draw the whole board """
+        self.surface.blit(self.background, (0, 0))
+        for square in self.squares.values():
+            square.draw()
+        return self.surface.get_rect()
+
+    def update(self, box, value):
+        """Redraw the square of one box with a new value and return its dirty rect """
+        square = self.squares[box]
+        square.setNumber(square_number(value))
+        rect = square.rect()
+        self.surface.blit(self.background, rect, rect)
+        return square.draw()
+
 
 def play(values, result, history):
     assignments = reconstruct(result, history)
     pygame.init()
 
-    size = width, height = 700, 700
+    size = width, height = BOARD_SIZE
     screen = pygame.display.set_mode(size)
 
-    background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
-
+    board = Board(values, screen)
     clock = pygame.time.Clock()
 
-    while True:
-        pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                string_number = values[rows[y] + cols[x]]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
+    pygame.event.pump()
+    board.draw()
+    pygame.display.flip()
+    for box, value in assignments:
         clock.tick(5)
-
-        if len(assignments) == 0:
-            break
-        box, value = assignments.pop()
+        pygame.event.pump()
         values[box] = value
+        pygame.display.update(board.update(box, value))
 
     # leave game showing until closed by user
     while True:
@@ -57,3 +98,95 @@ def play(values, result, history):
             if event.type == pygame.QUIT:
                 pygame.quit()
                 quit()
+
+
+def frames(values, result, history):
+    """Render the replay of a solution offscreen, without a display
+
+    Parameters
+    ----------
+    values(dict)
+        the starting board, as passed to `play`
+
+    result(dict)
+        the solved board
+
+    history(utils.Recorder)
+        the assignments recorded while solving (see `reconstruct`)
+
+    Yields
+    ------
+    pygame.Surface
+        the board before the first assignment and after each one; the same
+        surface is updated in place, so copy it to keep a frame
+    """
+    # the dummy video driver lets pygame run on servers without a display
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    surface = pygame.Surface(BOARD_SIZE)
+    board = Board(values, surface)
+    board.draw()
+    yield surface
+    for box, value in reconstruct(result, history):
+        board.update(box, value)
+        yield surface
+
+
+def export(values, result, history, path, fps=5):
+    """Export the replay of a solution as a GIF or a sequence of PNG files
+
+    Parameters
+    ----------
+    values(dict)
+        the starting board, as passed to `play`
+
+    result(dict)
+        the solved board
+
+    history(utils.Recorder)
+        the assignments recorded while solving (see `reconstruct`)
+
+    path(string)
+        'replay.gif' for an animated GIF (requires Pillow), or a pattern
+        such as 'frames/{:04d}.png' to write one PNG file per frame
+
+    fps(int)
+        frames per second of the GIF
+
+    Returns
+    -------
+    int
+        the number of frames rendered
+    """
+    if path.lower().endswith('.gif'):
+        if Image is None:
+            raise ImportError("Exporting a GIF requires Pillow (pip install pillow)")
+        images = [Image.frombytes('RGB', BOARD_SIZE, pygame.image.tostring(frame, 'RGB'))
+                  for frame in frames(values, result, history)]
+        images[0].save(path, save_all=True, append_images=images[1:], duration=1000 // fps, loop=0)
+        return len(images)
+    n = 0
+    for n, frame in enumerate(frames(values, result, history), 1):
+        pygame.image.save(frame, path.format(n - 1))
+    return n
+
+
+if __name__ == "__main__":
+    import argparse
+    import solution
+    from puzzle_io import read_grids
+
+    parser = argparse.ArgumentParser(description="Render the solution replay of every puzzle in a " +
+        "file offscreen (no display needed).")
+    parser.add_argument('path', help="Puzzle file to read, or '-' for standard input.")
+    parser.add_argument('-o', '--output', default='replay-{puzzle}.gif',
+                        help="Output path; '{puzzle}' is replaced by the puzzle number. Use a .gif " +
+                             "name for an animation or e.g. 'replay-{puzzle}-{:04d}.png' for PNG frames.")
+    parser.add_argument('--fps', type=int, default=5, help="Frames per second of GIF animations.")
+    args = parser.parse_args()
+
+    for i, grid in enumerate(read_grids(args.path)):
+        with Recorder() as history:
+            result = solution.solve(grid)
+        if result:
+            export(grid2values(grid), result, history, args.output.replace('{puzzle}', str(i)), args.fps)
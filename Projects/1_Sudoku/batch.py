@@ -0,0 +1,103 @@
+"""Solve many Sudoku puzzles at once on a pool of worker processes
+
+Example
+-------
+
+    $ python batch.py puzzles.txt --workers 4 > solutions.txt
+    $ python batch.py puzzles.txt.gz --mmap -o solutions.txt.gz
+
+Puzzles are streamed from the input file and solutions are streamed to the
+output file (see puzzle_io.py), so files of any size can be solved.
+
+Each worker process imports its own copy of the solver, so the module-level
+tables in solution.py and utils.py are never shared between puzzles that are
+solved concurrently.
+"""
+import argparse
+import os
+
+from functools import partial
+from multiprocessing import Pool
+
+import solution
+from puzzle_io import open_grids, read_grids, format_grid
+from utils import values2grid
+
+
+def _solve_one(solver, grid):
+    """Worker entry point; returns the input grid with its solution grid string
+    (or False) so results can be matched up when they arrive out of order.
+    """
+    result = solver(grid)
+    return grid, (values2grid(result) if result else False)
+
+
+def solve_many(grids, workers=None, chunksize=64, ordered=True, solver=solution.solve):
+    """Solve a stream of puzzles, optionally fanned out over a process pool
+
+    Parameters
+    ----------
+    grids(iterable)
+        an iterable of grid strings; it is consumed lazily, so a generator
+        such as `read_grids` can be used for files that do not fit in memory
+
+    workers(int)
+        number of worker processes (defaults to os.cpu_count()); with a single
+        worker the puzzles are solved in the calling process
+
+    chunksize(int)
+        number of puzzles sent to a worker at a time
+
+    ordered(bool)
+        yield results in input order if True, otherwise in completion order
+
+    solver(callable)
+        a module-level function with the `solution.solve` contract
+
+    Yields
+    ------
+    tuple
+        (grid, solved) pairs where solved is the solved grid string or False
+        if the puzzle has no solution
+    """
+    job = partial(_solve_one, solver)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(job, grids)
+        return
+    with Pool(workers) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(job, grids, chunksize)
+
+
+def solve_file(path, use_mmap=False, **kwargs):
+    """Solve every puzzle in a file; see `puzzle_io.read_grids` and `solve_many` """
+    return solve_many(read_grids(path, use_mmap), **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a file of diagonal Sudoku puzzles " +
+        "(one 81-character grid per line) and print the solved grids in the same format.")
+    parser.add_argument('path', help="Puzzle file to read (.gz files are decompressed), " +
+                        "or '-' for standard input.")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the solutions to (.gz files are compressed; " +
+                             "default: standard output).")
+    parser.add_argument('--mmap', action="store_true",
+                        help="Memory-map the puzzle file instead of reading it through a buffer.")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('-c', '--chunksize', type=int, default=64,
+                        help="Number of puzzles sent to a worker at a time.")
+    parser.add_argument('-u', '--unordered', action="store_true",
+                        help="Print 'puzzle<TAB>solution' lines as soon as they are ready " +
+                             "instead of solutions in input order.")
+    args = parser.parse_args()
+
+    results = solve_file(args.path, use_mmap=args.mmap, workers=args.workers,
+                         chunksize=args.chunksize, ordered=not args.unordered)
+    with open_grids(args.output, 'w') as out:
+        for grid, solved in results:
+            if args.unordered:
+                out.write(grid + '\t')
+            out.write(format_grid(solved) + '\n')
@@ -0,0 +1,386 @@
+"""Benchmark the Sudoku solvers and strategies over a fixed puzzle corpus
+
+Example
+-------
+
+    $ python benchmark.py                          # every set and target
+    $ python benchmark.py -s hard -t bitboard dlx  # a subset
+    $ python benchmark.py --save benchmarks/baseline.json
+    $ python benchmark.py --check benchmarks/baseline.json --threshold 0.25
+
+Each target is run over every puzzle of a set `repeat` times with nothing but
+a timer around it, to measure throughput (the fastest run of each puzzle is
+kept), and once more with counters wrapped around the search functions and
+the per-round hooks of the propagation loops, to count the nodes expanded and
+the propagation rounds. The counts are deterministic, so they can be compared
+with a baseline recorded on a different machine. Throughput is not, so every
+benchmark also times a fixed calibration workload that does not depend on
+the solvers, and each rate is stored as a `score` as well: puzzles per
+second divided by calibration batches per second.
+
+`--check` exits with status 1 if the score of any (set, target) pair dropped,
+or its node or round count grew, by more than the threshold compared with
+the stored baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from contextlib import contextmanager
+from functools import lru_cache
+
+import bitboard
+import solution
+from dlx import ExactCover
+from geometry import standard_geometry
+from profiling import Profiler
+from puzzle_io import read_grids
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+
+# set name -> (puzzle file, board geometry of the puzzles in the file)
+CORPUS = {
+    'easy': ('easy.txt', standard_geometry(3)),
+    'hard': ('hard.txt', standard_geometry(3)),
+    'diagonal': ('diagonal.txt', solution.geometry),
+}
+
+PERCENTILES = (50, 90, 99)
+
+
+@lru_cache()
+def _exact_cover(geometry):
+    return ExactCover(geometry.unitlist, geometry.digits, geometry.boxes)
+
+
+def _dict_target(func):
+    """Wrap a solution.py function that takes a values dict; the dict engine
+    only knows the diagonal geometry, so other sets are skipped.
+    """
+    def make(geometry):
+        if geometry is not solution.geometry:
+            return None
+        return lambda grid: func(solution.grid2values(grid))
+    return make
+
+
+def _solve_target(backend, strategies=()):
+    def make(geometry):
+        if geometry is not solution.geometry:
+            return None
+        return lambda grid: solution.solve(grid, backend, strategies)
+    return make
+
+
+def _bitboard_target(name):
+    def make(geometry):
+        engine = bitboard.engine(geometry)
+        if name == 'solve':
+            return engine.solve
+        # look the method up on every call so that `counting` sees it
+        return lambda grid: getattr(engine, name)(engine.grid2masks(grid))
+    return make
+
+
+def _dlx_target(geometry):
+    exact_cover = _exact_cover(geometry)
+    return lambda grid: exact_cover.search(geometry.grid2values(grid))
+
+
+# target name -> factory returning the function to time for a geometry (or None)
+TARGETS = {
+    'solve': _solve_target('search'),
+    'solve:inplace': _solve_target('inplace'),
+    'solve:dlx': _solve_target('dlx'),
+    'solve:subsets': _solve_target('search', ('naked_pairs', 'naked_triples', 'hidden_pairs',
+                                              'hidden_triples', 'pointing', 'claiming')),
+    'reduce_puzzle': _dict_target(lambda values: solution.reduce_puzzle(values)),
+    'propagate': _dict_target(lambda values: solution.propagate(values)),
+    'naked_twins': _dict_target(lambda values: solution.naked_twins(values)),
+    'eliminate': _dict_target(lambda values: solution.eliminate(values)),
+    'only_choice': _dict_target(lambda values: solution.only_choice(values)),
+    'bitboard': _bitboard_target('solve'),
+    'bitboard:reduce_puzzle': _bitboard_target('reduce_puzzle'),
+    'dlx': _dlx_target,
+}
+
+
+def _counted(counts, key, func):
+    def wrapper(*args, **kwargs):
+        counts[key] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def counting(geometry):
+    """Count search nodes and propagation rounds while the context is active
+
+    The search and propagation functions of every engine are temporarily
+    replaced by counting wrappers; recursive calls go through the module or
+    instance attribute, so they are counted as well.
+
+    Parameters
+    ----------
+    geometry(geometry.Geometry)
+        the geometry of the puzzles being solved; selects the engine instances
+
+    Yields
+    ------
+    dict
+        {'nodes': int, 'rounds': int}, updated as the functions are called
+    """
+    counts = {'nodes': 0, 'rounds': 0}
+    engine = bitboard.engine(geometry)
+    exact_cover = _exact_cover(geometry)
+    patches = [
+        (solution, 'search', 'nodes'),
+        (solution, 'search_inplace', 'nodes'),
+        (solution, 'trace_round', 'rounds'),
+        (solution.exact_cover, '_search', 'nodes'),
+        (engine, 'search', 'nodes'),
+        (engine, 'trace_round', 'rounds'),
+        (exact_cover, '_search', 'nodes'),
+    ]
+    # the rounds are counted by the hooks that the propagation loops call at
+    # the end of every round (solution.reduce_puzzle, propagate and
+    # apply_strategies, and Bitboard.reduce_puzzle); the single strategies
+    # and dlx do not propagate, so they report no rounds
+    saved_searches = dict(solution.SEARCHES)
+    saved = []
+    for owner, name, key in patches:
+        # (owner, name, attribute of the object itself rather than of its class)
+        saved.append((owner, name, vars(owner).get(name)))
+        setattr(owner, name, _counted(counts, key, getattr(owner, name)))
+    # solve() looks its backend up in SEARCHES, which holds the original functions
+    solution.SEARCHES.update(search=solution.search, inplace=solution.search_inplace,
+                             dlx=solution.exact_cover.search)
+    try:
+        yield counts
+    finally:
+        solution.SEARCHES.update(saved_searches)
+        for owner, name, original in reversed(saved):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+
+
+def percentile(data, p):
+    """Return the p-th percentile (nearest rank) of a sorted list """
+    rank = max(0, min(len(data) - 1, int(round(p / 100 * len(data) + 0.5)) - 1))
+    return data[rank]
+
+
+def _calibration_workload():
+    # string and dictionary operations like the ones the strategies do
+    values = {box: '123456789' for box in solution.boxes}
+    for digit in '123456789':
+        for box in solution.boxes:
+            values[box] = values[box].replace(digit, '') or digit
+    return sum(len(value) for value in values.values())
+
+
+def calibrate(repeat=5, number=200):
+    """Measure the speed of this machine on a fixed workload
+
+    The workload does not call the solvers, so optimizing (or slowing down)
+    them does not change the calibration.
+
+    Returns
+    -------
+    float
+        calibration batches (of `number` runs of the workload) per second,
+        from the fastest of `repeat` timed batches
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            _calibration_workload()
+        best = min(best, time.perf_counter() - start)
+    return 1 / best
+
+
+def run(func, grids, geometry, calibration=None, repeat=3):
+    """Time a target over a list of puzzles and count its work
+
+    Parameters
+    ----------
+    func(callable)
+        the function to benchmark; it is called with each grid string
+
+    grids(list)
+        the puzzles to run
+
+    geometry(geometry.Geometry)
+        the geometry of the puzzles
+
+    calibration(float)
+        the result of `calibrate` (measured if not given)
+
+    repeat(int)
+        the number of timed runs of each puzzle; the fastest one is kept
+
+    Returns
+    -------
+    dict
+        the number of puzzles, the overall puzzles per second ('rate') and
+        the rate relative to the calibration ('score'), the puzzles per
+        second at each of the PERCENTILES of the per-puzzle time (p90 is the
+        rate of a puzzle slower than 90% of the set), and the mean nodes and
+        propagation rounds per puzzle
+    """
+    calibration = calibration or calibrate()
+    times = [float('inf')] * len(grids)
+    for _ in range(repeat):
+        for i, grid in enumerate(grids):
+            start = time.perf_counter()
+            func(grid)
+            times[i] = min(times[i], time.perf_counter() - start)
+    with counting(geometry) as counts:
+        for grid in grids:
+            func(grid)
+    times.sort()
+    result = {'puzzles': len(grids), 'rate': len(grids) / max(sum(times), 1e-9)}
+    result['score'] = result['rate'] / calibration
+    for p in PERCENTILES:
+        result['p{}'.format(p)] = 1 / max(percentile(times, p), 1e-9)
+    result['nodes'] = counts['nodes'] / len(grids)
+    result['rounds'] = counts['rounds'] / len(grids)
+    return result
+
+
+def load_set(name, limit=None):
+    """Return the puzzles and geometry of a corpus set """
+    path, geometry = CORPUS[name]
+    grids = list(read_grids(os.path.join(CORPUS_DIR, path)))
+    return grids[:limit], geometry
+
+
+def benchmark(sets=None, targets=None, limit=None, repeat=3):
+    """Run every target over every puzzle set
+
+    Parameters
+    ----------
+    sets(list)
+        names of the CORPUS sets to run (default: all of them)
+
+    targets(list)
+        names of the TARGETS to run (default: all of them)
+
+    limit(int)
+        only use the first `limit` puzzles of each set
+
+    repeat(int)
+        the number of timed runs of each puzzle (see run)
+
+    Returns
+    -------
+    dict
+        {set name: {target name: result of `run`}}; targets that do not
+        support the geometry of a set are left out
+    """
+    report = {}
+    calibration = calibrate()
+    for set_name in sets or CORPUS:
+        grids, geometry = load_set(set_name, limit)
+        report[set_name] = {}
+        for target in targets or TARGETS:
+            func = TARGETS[target](geometry)
+            if func is not None:
+                report[set_name][target] = run(func, grids, geometry, calibration, repeat)
+    return report
+
+
+def compare(report, baseline, threshold=0.25):
+    """List the regressions of a report against a baseline
+
+    Parameters
+    ----------
+    report(dict)
+        the output of `benchmark`
+
+    baseline(dict)
+        a previously saved report
+
+    threshold(float)
+        the tolerated relative change, e.g. 0.25 allows the score to drop
+        by 25% and node or round counts to grow by 25%; the raw rates are
+        only compared if the baseline has no scores
+
+    Returns
+    -------
+    list
+        one message per regression; empty if there are none
+    """
+    failures = []
+    for set_name, results in report.items():
+        for target, result in results.items():
+            base = baseline.get(set_name, {}).get(target)
+            if base is None:
+                continue
+            if 'score' in base:
+                if result['score'] < base['score'] * (1 - threshold):
+                    failures.append("{}/{}: score {:.4f}, baseline {:.4f} ({:.1f} puzzles/s, baseline {:.1f})".format(
+                        set_name, target, result['score'], base['score'], result['rate'], base['rate']))
+            elif result['rate'] < base['rate'] * (1 - threshold):
+                failures.append("{}/{}: {:.1f} puzzles/s, baseline {:.1f}".format(
+                    set_name, target, result['rate'], base['rate']))
+            for key in ('nodes', 'rounds'):
+                if result[key] > base[key] * (1 + threshold):
+                    failures.append("{}/{}: {:.1f} {} per puzzle, baseline {:.1f}".format(
+                        set_name, target, result[key], key, base[key]))
+    return failures
+
+
+def print_report(report):
+    columns = ['rate', 'score'] + ['p{}'.format(p) for p in PERCENTILES] + ['nodes', 'rounds']
+    print("{:<10}{:<24}".format('set', 'target') + ''.join('{:>10}'.format(c) for c in columns))
+    for set_name, results in report.items():
+        for target, result in results.items():
+            print("{:<10}{:<24}".format(set_name, target) +
+                  ''.join('{:>10.1f}'.format(result[c]) for c in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solvers and strategies " +
+        "over the puzzle corpus in the benchmarks/ directory. Rates are in puzzles per second; " +
+        "pNN is the rate at the NNth percentile of the per-puzzle solve time.")
+    parser.add_argument('-s', '--sets', nargs="*", choices=list(CORPUS), default=None,
+                        help="Puzzle sets to run (default: all).")
+    parser.add_argument('-t', '--targets', nargs="*", choices=list(TARGETS), default=None,
+                        help="Solvers and strategies to run (default: all).")
+    parser.add_argument('-n', '--limit', type=int, default=None,
+                        help="Only use the first LIMIT puzzles of each set.")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Timed runs of each puzzle; the fastest is kept (default: 3).")
+    parser.add_argument('--save', metavar='PATH', help="Write the results to a JSON baseline file.")
+    parser.add_argument('--check', metavar='PATH', help="Compare the results with a JSON baseline file " +
+                        "and exit with status 1 on a regression.")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Relative change tolerated by --check (default: 0.25).")
+    parser.add_argument('--profile', metavar='PATH', help="Write per-strategy profiling statistics " +
+                        "to a JSON file (profiling slows the solvers down, so do not combine with --save).")
+    args = parser.parse_args()
+
+    if args.profile:
+        with Profiler() as profile:
+            report = benchmark(args.sets, args.targets, args.limit, args.repeat)
+        profile.display()
+        profile.dump(args.profile)
+    else:
+        report = benchmark(args.sets, args.targets, args.limit, args.repeat)
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.check:
+        with open(args.check) as f:
+            failures = compare(report, json.load(f), args.threshold)
+        for failure in failures:
+            print("REGRESSION", failure)
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,431 @@
+"""Bitmask candidate engine for Sudoku puzzles
+
+The board is a list of integers (one per box, in the same order as the
+geometry's boxes) where bit ``i`` is set while ``geometry.digits[i]`` is still
+a candidate for that box. Peer and unit tables are precomputed once per
+geometry as tuples of box indices, and the strategies below work on all digits
+of a unit at once with bitwise operations, so they never rebuild strings and
+scale to 16x16 and 25x25 boards. `reduce_puzzle` propagates incrementally from
+the boxes that changed (a solved box clears its digit from its peers), and
+`search` backtracks on a single board with a trail instead of copying it for
+every branch.
+
+The module-level functions use the diagonal 9x9 geometry of solution.py; use
+`engine(geometry)` for other variants:
+
+    >>> from geometry import standard_geometry
+    >>> values = engine(standard_geometry(4)).solve(grid)
+"""
+from functools import lru_cache
+
+from geometry import standard_geometry
+from utils import tracing
+
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+
+class Bitboard:
+    """Bitmask strategies and search for one board geometry
+
+    Parameters
+    ----------
+    geometry : geometry.Geometry
+        The board geometry; its unit and peer tables are converted to tuples
+        of box indices once, when the engine is created
+    """
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self.digits = geometry.digits
+        self.size = len(self.digits)
+        self.all_digits = (1 << len(self.digits)) - 1
+        self.bit = {d: 1 << i for i, d in enumerate(self.digits)}
+        index = {box: idx for idx, box in enumerate(geometry.boxes)}
+        self.units = [tuple(index[box] for box in unit) for unit in geometry.unitlist]
+        self.box_units = [tuple(u for u, unit in enumerate(self.units) if idx in unit)
+                          for idx in range(len(geometry.boxes))]
+        self.peers = [tuple(index[peer] for peer in sorted(geometry.peers[box])) for box in geometry.boxes]
+        # a lookup table is faster than counting bits, but only while it stays small
+        if len(self.digits) <= 16:
+            self.count = [_popcount(mask) for mask in range(self.all_digits + 1)].__getitem__
+        else:
+            self.count = _popcount
+
+    def label(self, mask):
+        """Return the candidate digits of a mask as a string """
+        return ''.join(d for i, d in enumerate(self.digits) if mask >> i & 1)
+
+    def grid2masks(self, grid):
+        """Convert a grid string into the list-of-masks board representation
+
+        Parameters
+        ----------
+        grid(string)
+            a string representing a sudoku grid.
+
+            Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+        Returns
+        -------
+        list
+            A list of candidate masks in box order
+        """
+        return [self.bit.get(val, self.all_digits) for val in grid]
+
+    def masks2values(self, masks):
+        """Convert the list-of-masks board representation to the values dictionary
+
+        Parameters
+        ----------
+        masks(list)
+            a list of candidate masks in box order
+
+        Returns
+        -------
+        dict
+            a dictionary of the form {'box_name': '123456789', ...}
+        """
+        return {box: self.label(mask) for box, mask in zip(self.geometry.boxes, masks)}
+
+    def masks2grid(self, masks):
+        """Convert the list-of-masks board representation to a grid string """
+        count = self.count
+        return ''.join(self.label(mask) if count(mask) == 1 else '.' for mask in masks)
+
+    def naked_twins(self, masks):
+        """Eliminate values using the naked twins strategy (see solution.naked_twins)
+
+        Parameters
+        ----------
+        masks(list)
+            a list of candidate masks in box order
+
+        Returns
+        -------
+        list
+            The board with the naked twins eliminated from the other boxes in each unit
+        """
+        for unit in self.units:
+            self._naked_twins(masks, unit)
+        return masks
+
+    def _naked_twins(self, masks, unit):
+        count = self.count
+        pairs = {}
+        for idx in unit:
+            mask = masks[idx]
+            if count(mask) == 2:
+                pairs[mask] = pairs.get(mask, 0) + 1
+        for twins, n in pairs.items():
+            if n < 2:
+                continue
+            keep = ~twins
+            for idx in unit:
+                if masks[idx] != twins:
+                    masks[idx] &= keep
+
+    def eliminate(self, masks):
+        """Remove the digits of the solved boxes of each unit from the rest of the unit
+
+        The solved digits of a unit are collected into a single mask and cleared
+        from every unsolved box of the unit at once. A digit that is solved in two
+        boxes of the same unit empties the second box so that `reduce_puzzle`
+        reports the contradiction.
+
+        Parameters
+        ----------
+        masks(list)
+            a list of candidate masks in box order
+
+        Returns
+        -------
+        list
+            The board with the assigned values eliminated from peers
+        """
+        for unit in self.units:
+            self._eliminate(masks, unit)
+        return masks
+
+    def _eliminate(self, masks, unit):
+        count = self.count
+        solved = 0
+        for idx in unit:
+            mask = masks[idx]
+            if count(mask) == 1:
+                if solved & mask:
+                    masks[idx] = 0
+                solved |= mask
+        if not solved:
+            return
+        keep = ~solved
+        for idx in unit:
+            mask = masks[idx]
+            if count(mask) > 1:
+                masks[idx] = mask & keep
+
+    def only_choice(self, masks):
+        """Assign every digit that fits in exactly one box of a unit to that box
+
+        All digits of a unit are processed at once: `once` accumulates the
+        digits seen in at least one box and `twice` the digits seen in two or
+        more. A box that is the only place for two different digits is emptied
+        so that `reduce_puzzle` reports the contradiction. Units with fewer
+        boxes than digits are skipped.
+
+        Parameters
+        ----------
+        masks(list)
+            a list of candidate masks in box order
+
+        Returns
+        -------
+        list
+            The board with all single-place digits assigned
+        """
+        for unit in self.units:
+            self._only_choice(masks, unit)
+        return masks
+
+    def _only_choice(self, masks, unit):
+        if len(unit) < self.size:
+            # a short unit (e.g. an extra unit of a few boxes) only requires
+            # different digits, so a digit need not have a place in it
+            return
+        count = self.count
+        once = twice = 0
+        for idx in unit:
+            mask = masks[idx]
+            twice |= once & mask
+            once |= mask
+        if once != self.all_digits:
+            # some digit has no place left in this unit
+            masks[unit[0]] = 0
+            return
+        exactly_once = once & ~twice
+        if not exactly_once:
+            return
+        for idx in unit:
+            hit = masks[idx] & exactly_once
+            if hit:
+                masks[idx] = hit if count(hit) == 1 else 0
+
+    def trace_round(self, masks):
+        """Display the board after a round of reduce_puzzle if verbose tracing
+        is active (see utils.trace_round) """
+        recorder = tracing()
+        if recorder is not None and recorder.verbose:
+            self.geometry.display(self.masks2values(masks))
+
+    def reduce_puzzle(self, masks, changed=None, trail=None):
+        """Reduce a board by incremental constraint propagation
+
+        Like solution.propagate, only the work that a change makes necessary
+        is done: a box that becomes solved removes its digit from its peers
+        directly, a box left with two candidates looks for its naked twin in
+        its units, and only the units that contain a changed box are checked
+        for only choices. The board is reduced in place.
+
+        Parameters
+        ----------
+        masks(list)
+            a list of candidate masks in box order
+
+        changed(iterable)
+            indices of the boxes that changed since the board was last
+            reduced; by default every box (and every unit) is checked
+
+        trail(list)
+            if given, the (box index, previous mask) of every box that is
+            changed is appended to it so the changes can be rolled back with
+            `undo`
+
+        Returns
+        -------
+        list or False
+            The board after the strategies no longer produce any changes, or
+            False if the puzzle is unsolvable
+        """
+        units, box_units, peers, count = self.units, self.box_units, self.peers, self.count
+        size, all_digits = self.size, self.all_digits
+        if changed is None:
+            box_queue = list(range(len(masks)))
+            dirty = set(range(len(units)))
+        else:
+            box_queue = list(changed)
+            dirty = {u for idx in box_queue for u in box_units[idx]}
+        queued = set(box_queue)
+
+        def update(idx, mask):
+            """Set the candidates of a box and schedule the follow-up work """
+            if trail is not None:
+                trail.append((idx, masks[idx]))
+            masks[idx] = mask
+            if idx not in queued:
+                queued.add(idx)
+                box_queue.append(idx)
+            dirty.update(box_units[idx])
+            return mask != 0
+
+        while True:
+            # box work first: eliminate and naked twins
+            while box_queue:
+                idx = box_queue.pop()
+                queued.discard(idx)
+                mask = masks[idx]
+                n = count(mask)
+                if n == 1:
+                    keep = ~mask
+                    for peer in peers[idx]:
+                        if masks[peer] & mask and not update(peer, masks[peer] & keep):
+                            return False
+                elif n == 2:
+                    for u in box_units[idx]:
+                        unit = units[u]
+                        twins = [other for other in unit if masks[other] == mask]
+                        if len(twins) > 2:
+                            return False
+                        if len(twins) == 2:
+                            keep = ~mask
+                            for other in unit:
+                                other_mask = masks[other]
+                                if other_mask & mask and other_mask != mask \
+                                        and not update(other, other_mask & keep):
+                                    return False
+            if not dirty:
+                return masks
+            # then a round of only choice over the units that changed
+            todo, dirty = dirty, set()
+            for u in todo:
+                unit = units[u]
+                if len(unit) < size:
+                    # a short unit (e.g. an extra unit of a few boxes) only
+                    # requires different digits, so a digit need not have a place in it
+                    continue
+                once = twice = 0
+                for idx in unit:
+                    mask = masks[idx]
+                    twice |= once & mask
+                    once |= mask
+                if once != all_digits:
+                    # some digit has no place left in this unit
+                    return False
+                exactly_once = once & ~twice
+                if not exactly_once:
+                    continue
+                for idx in unit:
+                    mask = masks[idx]
+                    hit = mask & exactly_once
+                    if hit:
+                        if count(hit) > 1:
+                            # the only place for two digits
+                            return False
+                        if hit != mask:
+                            update(idx, hit)
+            self.trace_round(masks)
+
+    def undo(self, masks, trail, mark):
+        """Roll the board back to the state it had when the trail was `mark` entries long """
+        while len(trail) > mark:
+            idx, mask = trail.pop()
+            masks[idx] = mask
+
+    def search(self, masks, changed=None, trail=None):
+        """Apply depth first search with constraint propagation to the board
+
+        The search works on a single board: every change is logged on the
+        trail and undone when a branch fails, instead of copying the board
+        for every branch.
+
+        Parameters
+        ----------
+        masks(list)
+            a list of candidate masks in box order; it is changed in place
+
+        changed(iterable)
+            the boxes to propagate from first (see reduce_puzzle)
+
+        trail(list)
+            the changes made below the current node (see reduce_puzzle)
+
+        Returns
+        -------
+        list or False
+            The board with all boxes assigned or False
+        """
+        trail = [] if trail is None else trail
+        if self.reduce_puzzle(masks, changed, trail) is False:
+            return False
+        count = self.count
+        unsolved = [(count(mask), idx) for idx, mask in enumerate(masks) if count(mask) > 1]
+        if not unsolved:
+            return masks
+        # Choose one of the unfilled boxes with the fewest possibilities
+        _, idx = min(unsolved)
+        remaining = masks[idx]
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            mark = len(trail)
+            trail.append((idx, masks[idx]))
+            masks[idx] = bit
+            if self.search(masks, (idx,), trail):
+                return masks
+            self.undo(masks, trail, mark)
+        return False
+
+    def solve(self, grid):
+        """Find the solution to a Sudoku puzzle using the bitmask engine
+
+        Parameters
+        ----------
+        grid(string)
+            a string representing a sudoku grid.
+
+            Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+        Returns
+        -------
+        dict or False
+            The dictionary representation of the final sudoku grid or False if no solution exists.
+        """
+        masks = self.search(self.grid2masks(grid))
+        if masks is False:
+            return False
+        return self.masks2values(masks)
+
+
+@lru_cache()
+def engine(geometry):
+    """Return the (cached) bitmask engine for a geometry """
+    return Bitboard(geometry)
+
+
+_default = engine(standard_geometry(3, diagonal=True))
+grid2masks = _default.grid2masks
+masks2values = _default.masks2values
+masks2grid = _default.masks2grid
+naked_twins = _default.naked_twins
+eliminate = _default.eliminate
+only_choice = _default.only_choice
+reduce_puzzle = _default.reduce_puzzle
+search = _default.search
+
+
+def solve(grid, geometry=None):
+    """Find the solution to a Sudoku puzzle using the bitmask engine
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    geometry(geometry.Geometry)
+        the board geometry (default: 9x9 diagonal Sudoku)
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    return (_default if geometry is None else engine(geometry)).solve(grid)
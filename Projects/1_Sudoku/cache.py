@@ -0,0 +1,77 @@
+"""Bounded LRU cache for solved puzzles and search states
+
+`solution.solve` and `solution.search` take an optional cache. solve() keys
+it by the puzzle's grid string and solver configuration (backend and
+strategies) and stores the solved grid string (or False), so repeated
+requests for a popular puzzle are answered without searching. search() keys
+it by the strategies and the candidate bitmasks of every branching state it
+reaches after propagation (see solution.state_key) and stores the solution
+found below it, or False for a dead end, so later searches that propagate
+into the same state skip that subtree:
+
+    >>> cache = LRUCache(maxsize=100000)
+    >>> values = solve(grid, cache=cache)
+    >>> cache.cache_info()
+    CacheInfo(hits=0, misses=1, maxsize=100000, currsize=1, evictions=0)
+
+Values are stored as grid strings rather than dictionaries, which keeps the
+cache small and means callers can never mutate a cached result.
+"""
+from collections import OrderedDict, namedtuple
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'evictions'])
+
+
+class LRUCache:
+    """A dictionary that keeps at most `maxsize` entries, evicting the least
+    recently used one, and counts its hits and misses
+
+    Parameters
+    ----------
+    maxsize(int)
+        the number of entries to keep; None for no limit
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        """Return the value stored for key (marking it as recently used), or default """
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entry if the cache is full """
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if self.maxsize is not None and len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def cache_info(self):
+        """Report the cache statistics, like functools.lru_cache """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data), self.evictions)
+
+    def hit_rate(self):
+        """Return the fraction of lookups that were hits """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Remove every entry and reset the statistics """
+        self.data.clear()
+        self.hits = self.misses = self.evictions = 0
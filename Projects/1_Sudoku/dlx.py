@@ -0,0 +1,115 @@
+"""Exact cover (Algorithm X) backend for Sudoku variants
+
+Every Sudoku variant that is described by a list of units can be encoded as an
+exact cover problem: each (box, digit) choice is a row, and the columns are the
+constraints "box X holds exactly one digit" plus "digit d appears exactly once
+in unit U" for every unit in the unitlist. Algorithm X then covers all of the
+columns with a set of non-overlapping rows.
+
+The "dancing links" are implemented with a dict of sets (column -> rows that
+cover it) instead of a toroidal linked list, which gives the same
+cover/uncover operations but is much faster to build and run in Python.
+"""
+from utils import boxes
+
+
+class ExactCover:
+    """Algorithm X solver for the Sudoku variant defined by a unitlist
+
+    Parameters
+    ----------
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes;
+        every unit must contain one box for each digit
+
+    digits(string)
+        the symbols that can be placed in a box
+
+    boxes(list)
+        the box names of the board (default: the 9x9 boxes from utils.py)
+    """
+    def __init__(self, unitlist, digits='123456789', boxes=boxes):
+        self.digits = digits
+        self.boxes = boxes
+        self.rows = {}
+        for box in boxes:
+            box_units = [idx for idx, unit in enumerate(unitlist) if box in unit]
+            for digit in digits:
+                self.rows[box, digit] = [('box', box)] + [(idx, digit) for idx in box_units]
+        self.columns = [('box', box) for box in boxes] + \
+                       [(idx, digit) for idx in range(len(unitlist)) for digit in digits]
+
+    def _columns(self, values):
+        """Build the column -> rows map for the candidates left in values """
+        # a column that no remaining candidate can cover stays empty, which
+        # makes it the first column chosen and immediately ends the search
+        X = {col: set() for col in self.columns}
+        for box in self.boxes:
+            for digit in values[box]:
+                for col in self.rows[box, digit]:
+                    X[col].add((box, digit))
+        return X
+
+    def _select(self, X, row):
+        cols = []
+        for j in self.rows[row]:
+            for i in X[j]:
+                for k in self.rows[i]:
+                    if k != j:
+                        X[k].discard(i)
+            cols.append(X.pop(j))
+        return cols
+
+    def _deselect(self, X, row, cols):
+        for j in reversed(self.rows[row]):
+            X[j] = cols.pop()
+            for i in X[j]:
+                for k in self.rows[i]:
+                    if k != j:
+                        X[k].add(i)
+
+    def _search(self, X, partial):
+        if not X:
+            yield list(partial)
+            return
+        col = min(X, key=lambda c: len(X[c]))
+        # sorted, so the search (and its node count) does not depend on string hashing
+        for row in sorted(X[col]):
+            partial.append(row)
+            cols = self._select(X, row)
+            yield from self._search(X, partial)
+            self._deselect(X, row, cols)
+            partial.pop()
+
+    def solutions(self, values):
+        """Lazily enumerate every solution of a puzzle
+
+        Parameters
+        ----------
+        values(dict)
+            a dictionary of the form {'box_name': '123456789', ...}
+
+        Yields
+        ------
+        dict
+            The dictionary representation of each solved sudoku grid
+        """
+        for rows in self._search(self._columns(values), []):
+            yield dict(rows)
+
+    def search(self, values):
+        """Return the first solution of a puzzle (same contract as solution.search) """
+        return next(self.solutions(values), False)
+
+    def count(self, values, limit=None):
+        """Count the solutions of a puzzle, stopping early once `limit` are found """
+        n = 0
+        for _ in self.solutions(values):
+            n += 1
+            if n == limit:
+                break
+        return n
+
+    def is_unique(self, values):
+        """Return True if the puzzle has exactly one solution """
+        return self.count(values, limit=2) == 1
@@ -0,0 +1,324 @@
+"""Generate diagonal Sudoku puzzles with a unique solution and grade them
+
+Example
+-------
+
+    $ python generator.py -n 1000 --workers 4 --difficulty hard -o hard.txt
+    $ python generator.py -n 1000 --rate 20 -o puzzles.txt
+
+A puzzle is made by filling an empty board with random assignments (each one
+followed by constraint propagation), then removing the clues in random order
+and putting a clue back whenever the puzzle would stop having a unique
+solution. Because the solution is known, uniqueness after removing a clue is a
+single search -- for a solution with a different digit in that box -- instead
+of counting all the solutions. Puzzles of a given difficulty below 'expert'
+are made the same way, except that a clue is also put back when the
+strategies of that difficulty can no longer solve the puzzle.
+
+The difficulty of a puzzle is the first of LEVELS whose strategies solve it
+without search, or 'expert' if it needs search; the grade also
+records the number of nodes the search expands.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import warnings
+
+from functools import partial
+from multiprocessing import Pool
+
+from solution import (boxes, grid2values, values2grid, assign_value, propagate, propagate_with,
+                      search, DEFAULT_STRATEGIES)
+from puzzle_io import open_grids
+
+
+RATE_SAMPLE = 3  # puzzles timed in the calling process to size the pool for a rate
+RATE_TOLERANCE = 0.1  # a rate more than 10% below the target triggers a warning
+
+
+MEDIUM_STRATEGIES = DEFAULT_STRATEGIES + ('pointing', 'claiming')
+HARD_STRATEGIES = MEDIUM_STRATEGIES + ('naked_pairs', 'hidden_pairs', 'naked_triples', 'hidden_triples',
+                                       'naked_quads', 'hidden_quads')
+
+# (difficulty, strategies that solve a puzzle of that difficulty without search)
+LEVELS = [
+    ('easy', DEFAULT_STRATEGIES),
+    ('medium', MEDIUM_STRATEGIES),
+    ('hard', HARD_STRATEGIES),
+]
+DIFFICULTIES = [name for name, _ in LEVELS] + ['expert']
+
+
+def random_solution(rng):
+    """Return a random solved diagonal Sudoku grid
+
+    Parameters
+    ----------
+    rng(random.Random)
+        the random number generator to use
+
+    Returns
+    -------
+    string
+        a string representing a solved sudoku grid
+    """
+    while True:
+        values = propagate(grid2values('.' * len(boxes)))
+        while values:
+            unsolved = [box for box in boxes if len(values[box]) > 1]
+            if not unsolved:
+                return values2grid(values)
+            box = rng.choice(unsolved)
+            options = values[box]
+            digit = rng.choice(options)
+            assign_value(values, box, digit)
+            values = propagate(values, {box: options.replace(digit, '')})
+
+
+def has_other_solution(grid, box, digit):
+    """Return True if the puzzle has a solution without `digit` in `box`
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid with `box` empty
+
+    box(string)
+        the box of a clue that was just removed from the grid
+
+    digit(string)
+        the value of that clue in the known solution
+    """
+    values = grid2values(grid)
+    values[box] = values[box].replace(digit, '')
+    return search(values) is not False
+
+
+def solves(grid, strategies):
+    """Return True if the given strategies solve the puzzle without search
+
+    The default strategies are applied by incremental propagation, and the
+    others only when it stalls (see solution.propagate_with), which reaches
+    the same result as reduce_puzzle in a fraction of the time.
+    """
+    extra = tuple(name for name in strategies if name not in DEFAULT_STRATEGIES)
+    values = propagate_with(grid2values(grid), extra)
+    return bool(values) and all(len(values[box]) == 1 for box in boxes)
+
+
+def make_puzzle(rng, difficulty=None):
+    """Return a random diagonal Sudoku puzzle with a unique solution
+
+    Parameters
+    ----------
+    rng(random.Random)
+        the random number generator to use
+
+    difficulty(string)
+        if one of the LEVELS, only remove clues while the strategies of that
+        level still solve the puzzle without search (which also guarantees a
+        unique solution); the puzzle may turn out easier than that level
+
+    Returns
+    -------
+    string
+        a string representing a sudoku grid; removing any of its clues would
+        give it more than one solution (or make it too hard for `difficulty`)
+    """
+    strategies = dict(LEVELS).get(difficulty)
+    grid = list(random_solution(rng))
+    for idx in rng.sample(range(len(grid)), len(grid)):
+        digit, grid[idx] = grid[idx], '.'
+        if strategies is None:
+            keep = has_other_solution(''.join(grid), boxes[idx], digit)
+        else:
+            keep = not solves(''.join(grid), strategies)
+        if keep:
+            grid[idx] = digit
+    return ''.join(grid)
+
+
+def grade(grid):
+    """Grade the difficulty of a puzzle
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid with a unique solution
+
+    Returns
+    -------
+    dict
+        'difficulty' (one of DIFFICULTIES), 'strategies' (the strategies that
+        solve the puzzle without search, or None for 'expert' puzzles),
+        'nodes' (the nodes expanded by search) and 'clues'
+    """
+    result = {'clues': sum(val != '.' for val in grid)}
+    stats = {}
+    search(grid2values(grid), stats=stats)
+    result['nodes'] = stats['nodes']
+    for name, strategies in LEVELS:
+        if solves(grid, strategies):
+            result.update(difficulty=name, strategies=strategies)
+            return result
+    result.update(difficulty='expert', strategies=None)
+    return result
+
+
+def generate(difficulty=None, rng=random):
+    """Make puzzles until one of the requested difficulty comes up
+
+    Parameters
+    ----------
+    difficulty(string)
+        one of DIFFICULTIES, or None to accept any puzzle
+
+    rng(random.Random)
+        the random number generator to use
+
+    Returns
+    -------
+    tuple
+        (grid, grade) for the puzzle; see `grade`
+    """
+    while True:
+        grid = make_puzzle(rng, difficulty)
+        result = grade(grid)
+        if difficulty is None or result['difficulty'] == difficulty:
+            return grid, result
+
+
+def _generate_one(difficulty, seed):
+    """Worker entry point; every puzzle gets its own seed so that a run is
+    reproducible no matter how the puzzles are spread over the workers.
+    """
+    return generate(difficulty, random.Random(seed))
+
+
+def generate_many(n, workers=None, difficulty=None, seed=None, chunksize=1, rate=None, deadline=None):
+    """Generate puzzles on a pool of worker processes
+
+    Parameters
+    ----------
+    n(int)
+        number of puzzles to generate
+
+    workers(int)
+        number of worker processes (defaults to os.cpu_count()); with a single
+        worker the puzzles are generated in the calling process
+
+    difficulty(string)
+        only keep puzzles of this difficulty (one of DIFFICULTIES)
+
+    seed(int)
+        seed for a reproducible set of puzzles (random by default)
+
+    chunksize(int)
+        number of puzzles sent to a worker at a time
+
+    rate(float)
+        target rate in puzzles per second. Unless `workers` is given, the
+        first RATE_SAMPLE puzzles are generated in the calling process to
+        time them, and just enough workers are started for the others to
+        reach the rate (at most one per CPU). Puzzles are never yielded
+        faster than the rate; if all n puzzles take more than RATE_TOLERANCE
+        longer than n / rate, a RuntimeWarning is issued
+
+    deadline(float)
+        if given, stop after this many seconds, even if fewer than n puzzles
+        were generated
+
+    Yields
+    ------
+    tuple
+        (grid, grade) pairs, in completion order
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    seeds = ('{}:{}'.format(seed, i) for i in range(n))
+    job = partial(_generate_one, difficulty)
+    start = time.perf_counter()
+    stop = None if deadline is None else start + deadline
+    count = 0
+
+    def paced(puzzle):
+        # hold the puzzle back until it is due at the target rate
+        nonlocal count
+        count += 1
+        if rate is not None:
+            time.sleep(max(0.0, start + count / rate - time.perf_counter()))
+        return puzzle
+
+    def expired():
+        return stop is not None and time.perf_counter() >= stop
+
+    cpus = os.cpu_count() or 1
+    if workers is None and rate is not None:
+        sample = min(n, RATE_SAMPLE)
+        busy = 0.0  # generation time of the sample, without the pacing
+        for _ in range(sample):
+            if expired():
+                return
+            began = time.perf_counter()
+            puzzle = job(next(seeds))
+            busy += time.perf_counter() - began
+            yield paced(puzzle)
+        workers = max(1, min(cpus, math.ceil(rate * busy / max(sample, 1))))
+    workers = workers or cpus
+    if count < n and workers == 1:
+        for s in seeds:
+            if expired():
+                return
+            yield paced(job(s))
+    elif count < n:
+        with Pool(workers) as pool:
+            results = pool.imap_unordered(job, seeds, chunksize)
+            while count < n:
+                try:
+                    puzzle = results.next(None if stop is None else max(0, stop - time.perf_counter()))
+                except multiprocessing.TimeoutError:
+                    return
+                yield paced(puzzle)
+    elapsed = time.perf_counter() - start
+    if rate is not None and n and elapsed > (1 + RATE_TOLERANCE) * n / rate:
+        warnings.warn("generated {} puzzles at {:.1f} puzzles/s, below the target of {:.1f}".format(
+            n, n / elapsed, rate), RuntimeWarning)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate diagonal Sudoku puzzles with a unique " +
+        "solution. Each puzzle is written on its own line, after a comment line with its grade.")
+    parser.add_argument('-n', type=int, default=10, help="Number of puzzles to generate.")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('-d', '--difficulty', choices=DIFFICULTIES, default=None,
+                        help="Only keep puzzles of this difficulty.")
+    parser.add_argument('-r', '--rate', type=float, default=None,
+                        help="Target rate in puzzles per second: start as many workers as needed " +
+                             "(unless --workers is given), and warn if the rate is not reached.")
+    parser.add_argument('--deadline', type=float, default=None, metavar='SECONDS',
+                        help="Stop after this many seconds; exit with an error if fewer than N " +
+                             "puzzles were written.")
+    parser.add_argument('-s', '--seed', type=int, default=None, help="Random seed.")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the puzzles to (default: standard output).")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = 0
+    with open_grids(args.output, 'w') as out:
+        for grid, result in generate_many(args.n, args.workers, args.difficulty, args.seed, rate=args.rate,
+                                          deadline=args.deadline):
+            out.write('# {difficulty}, {clues} clues, {nodes} nodes\n'.format(**result))
+            out.write(grid + '\n')
+            count += 1
+    elapsed = time.perf_counter() - start
+    target = "" if args.rate is None else ", target {:.1f}".format(args.rate)
+    print("{} puzzles in {:.1f}s ({:.1f} puzzles/s{})".format(count, elapsed, count / elapsed, target),
+          file=sys.stderr)
+    if count < args.n:
+        sys.exit("Only {} of {} puzzles were generated before the deadline".format(count, args.n))
@@ -0,0 +1,155 @@
+"""Board geometry for N²×N² Sudoku variants
+
+A Geometry bundles the box names, digit symbols, units and peers of one
+Sudoku variant. The factory functions below are cached, so the unit and peer
+tables for a given variant are only computed once no matter how many puzzles
+are solved with it (and engines that precompute their own tables per geometry,
+like bitboard.Bitboard, can cache on the geometry object as well).
+
+Example
+-------
+
+    >>> geometry = standard_geometry(4)         # 16x16 Sudoku
+    >>> len(geometry.boxes), geometry.digits
+    (256, '123456789ABCDEFG')
+"""
+from functools import lru_cache
+
+from utils import cross, extract_units, extract_peers
+
+
+ROW_LABELS = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
+DIGIT_SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+
+
+class Geometry:
+    """The boxes, units and peers of a Sudoku variant
+
+    Attributes
+    ----------
+    rows : string
+        One label per row of the board, e.g. 'ABCDEFGHI'
+
+    cols : list
+        One label per column of the board, e.g. ['1', '2', ..., '9']
+
+    digits : string
+        The symbols that can be placed in a box; a grid string uses '.' for
+        an empty box and one of these symbols otherwise
+
+    boxes : list
+        The box names in row-major order (the order used by grid strings)
+
+    unitlist : list
+        Every unit (row, column, block, region, diagonal, ...) as a list of boxes
+
+    units : dict
+        Mapping from each box to the list of units that contain it
+
+    peers : dict
+        Mapping from each box to the set of boxes that share a unit with it
+    """
+    def __init__(self, rows, cols, digits, unitlist):
+        self.rows = rows
+        self.cols = list(cols)
+        self.digits = digits
+        self.boxes = cross(rows, self.cols)
+        self.unitlist = unitlist
+        self.units = extract_units(unitlist, self.boxes)
+        self.peers = extract_peers(self.units, self.boxes)
+
+    def __len__(self):
+        return len(self.digits)
+
+    def __repr__(self):
+        return '<Geometry {0}x{0}, {1} units>'.format(len(self), len(self.unitlist))
+
+    def grid2values(self, grid):
+        """Convert a grid string into a dict of {box: candidate digits} """
+        return {box: self.digits if val == '.' else val for val, box in zip(grid, self.boxes)}
+
+    def values2grid(self, values):
+        """Convert a dict of {box: candidate digits} into a grid string """
+        return ''.join(values[box] if len(values[box]) == 1 else '.' for box in self.boxes)
+
+    def display(self, values):
+        """Display the values as a 2-D grid (row by row, without block separators) """
+        width = 1 + max(len(values[box]) for box in self.boxes)
+        for r in self.rows:
+            print(''.join(values[r + c].center(width) for c in self.cols))
+        print()
+
+
+def _rows_and_cols(size):
+    if size > len(DIGIT_SYMBOLS):
+        raise ValueError("Boards larger than {0}x{0} are not supported".format(len(DIGIT_SYMBOLS)))
+    return ROW_LABELS[:size], [str(i + 1) for i in range(size)]
+
+
+def _line_units(rows, cols, diagonal, extra_units):
+    units = [cross(r, cols) for r in rows] + [cross(rows, [c]) for c in cols]
+    if diagonal:
+        units.append([r + c for r, c in zip(rows, cols)])
+        units.append([r + c for r, c in zip(rows, cols[::-1])])
+    return units + [list(unit) for unit in extra_units]
+
+
+@lru_cache()
+def standard_geometry(n=3, diagonal=False, extra_units=()):
+    """Return the geometry of an N²×N² Sudoku with N×N blocks
+
+    Parameters
+    ----------
+    n : int
+        The block size; 3 is the classic 9x9 board, 4 is 16x16, 5 is 25x25
+
+    diagonal : bool
+        Add the two main diagonals as units (diagonal Sudoku)
+
+    extra_units : tuple
+        Additional units, each one a tuple of box names
+
+    Returns
+    -------
+    Geometry
+        The (cached) geometry for the variant
+    """
+    size = n * n
+    rows, cols = _rows_and_cols(size)
+    blocks = [cross(rows[i:i + n], cols[j:j + n]) for i in range(0, size, n) for j in range(0, size, n)]
+    units = _line_units(rows, cols, diagonal, extra_units)
+    return Geometry(rows, cols, DIGIT_SYMBOLS[:size], units[:2 * size] + blocks + units[2 * size:])
+
+
+@lru_cache()
+def jigsaw_geometry(regions, diagonal=False, extra_units=()):
+    """Return the geometry of a jigsaw Sudoku with irregular regions
+
+    Parameters
+    ----------
+    regions : string
+        One region label per box in row-major order, e.g. 'AAABBBCCC...';
+        every region must contain as many boxes as there are rows
+
+    diagonal : bool
+        Add the two main diagonals as units
+
+    extra_units : tuple
+        Additional units, each one a tuple of box names
+
+    Returns
+    -------
+    Geometry
+        The (cached) geometry for the variant
+    """
+    size = int(round(len(regions) ** 0.5))
+    if size * size != len(regions):
+        raise ValueError("The region map must have one label per box of a square board")
+    rows, cols = _rows_and_cols(size)
+    boxes = cross(rows, cols)
+    labels = sorted(set(regions))
+    blocks = [[box for box, label in zip(boxes, regions) if label == region] for region in labels]
+    if len(blocks) != size or any(len(block) != size for block in blocks):
+        raise ValueError("A {0}x{0} jigsaw needs {0} regions of {0} boxes".format(size))
+    units = _line_units(rows, cols, diagonal, extra_units)
+    return Geometry(rows, cols, DIGIT_SYMBOLS[:size], units[:2 * size] + blocks + units[2 * size:])
@@ -1,5 +1,6 @@
 import pygame
 
+from functools import lru_cache
 from pygame import *
 
 def AAfilledRoundedRect(surface,rect,color,radius=0.4):
@@ -13,12 +14,24 @@ def AAfilledRoundedRect(surface,rect,color,radius=0.4):
     radius  : 0 <= radius <= 1
     """
 
-    rect         = Rect(rect)
+    rect = Rect(rect)
+    return surface.blit(roundedRectSurface(rect.size, tuple(color), radius), rect.topleft)
+
+
+@lru_cache(maxsize=None)
+def roundedRectSurface(size,color,radius=0.4):
+
+    """
+    roundedRectSurface(size,color,radius=0.4)
+
+    Render an anti-aliased rounded rectangle once; the result is cached per
+    (size, color, radius), so squares of the same color share one surface.
+    """
+
+    rect         = Rect((0, 0), size)
     color        = Color(*color)
     alpha        = color.a
     color.a      = 0
-    pos          = rect.topleft
-    rect.topleft = 0,0
     rectangle    = Surface(rect.size,SRCALPHA)
 
     circle       = Surface([min(rect.size)*3]*2,SRCALPHA)
@@ -39,22 +52,26 @@ def AAfilledRoundedRect(surface,rect,color,radius=0.4):
     rectangle.fill(color,special_flags=BLEND_RGBA_MAX)
     rectangle.fill((255,255,255,alpha),special_flags=BLEND_RGBA_MIN)
 
-    return surface.blit(rectangle,pos)
+    return rectangle
+
+
+@lru_cache(maxsize=None)
+def squareFont():
+    """The font of the square numbers, loaded once and shared by every square """
+    # print("FONTS", pygame.font.get_fonts())
+    return pygame.font.SysFont('opensans', 21)
+
 
 class SudokuSquare:
     """A sudoku square class."""
-    def __init__(self, number=None, offsetX=0, offsetY=0, edit="Y", xLoc=0, yLoc=0):
-        if number != None:
-            number = str(number)
-            self.color = (2, 204, 186)
-        else:
-            number = ""
-            self.color = (255, 255, 255)
-        # print("FONTS", pygame.font.get_fonts())
-        self.font = pygame.font.SysFont('opensans', 21)
-        self.text = self.font.render(number, 1, (255, 255, 255))
-        self.textpos = self.text.get_rect()
-        self.textpos = self.textpos.move(offsetX + 17, offsetY + 4)
+    size = (45, 40)
+
+    def __init__(self, number=None, offsetX=0, offsetY=0, edit="Y", xLoc=0, yLoc=0, surface=None):
+        self.font = squareFont()
+        self.surface = surface
+        self.offsetX = offsetX
+        self.offsetY = offsetY
+        self.setNumber(number)
 
         # self.collide = pygame.Surface((25, 22))
         # self.collide = self.collide.convert()
@@ -67,15 +84,30 @@ class SudokuSquare:
         self.edit = edit
         self.xLoc = xLoc
         self.yLoc = yLoc
-        self.offsetX = offsetX
-        self.offsetY = offsetY
+
+    def setNumber(self, number):
+        """Show a new number (or None for an empty square); call draw() to redraw """
+        if number != None:
+            number = str(number)
+            self.color = (2, 204, 186)
+        else:
+            number = ""
+            self.color = (255, 255, 255)
+        self.number = number
+        self.text = self.font.render(number, 1, (255, 255, 255))
+        self.textpos = self.text.get_rect()
+        self.textpos = self.textpos.move(self.offsetX + 17, self.offsetY + 4)
+
+    def rect(self):
+        return Rect((self.offsetX, self.offsetY), self.size)
 
     def draw(self):
-        screen = pygame.display.get_surface()
-        AAfilledRoundedRect(screen, (self.offsetX, self.offsetY, 45, 40), self.color)
+        screen = self.surface or pygame.display.get_surface()
+        AAfilledRoundedRect(screen, self.rect(), self.color)
 
         # screen.blit(self.collide, self.collideRect)
         screen.blit(self.text, self.textpos)
+        return self.rect()
 
 
     def checkCollide(self, collision):
@@ -0,0 +1,143 @@
+"""Opt-in cost/benefit profiling of the Sudoku strategies
+
+Nothing is measured unless a Profiler is active. Use it as a context manager
+around the solver, then inspect or export the statistics:
+
+    with Profiler() as profile:
+        for grid in grids:
+            solve(grid, strategies=('hidden_pairs', 'pointing'))
+    profile.dump('profile.json')
+
+Every strategy that reduce_puzzle, apply_strategies or search runs is timed,
+and the candidates it eliminated and the boxes it solved are counted, so
+strategies can be ordered or disabled based on what they remove per second on
+a given puzzle mix. propagate interleaves eliminate, naked_twins and
+only_choice in one pass, so it splits its time and work between them with
+Laps (each strategy counts one call per pass that used it).
+"""
+import json
+import time
+
+
+_profiler = None  # the active Profiler, if any; profiling is off by default
+
+
+class Profiler:
+    """Per-strategy call counts, wall time, eliminated candidates and solved boxes
+
+    Attributes
+    ----------
+    stats : dict
+        {strategy name: {'calls': int, 'seconds': float, 'eliminated': int,
+        'solved': int}}
+    """
+    def __init__(self):
+        self.stats = {}
+        self._previous = None
+
+    def __enter__(self):
+        global _profiler
+        self._previous, _profiler = _profiler, self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _profiler
+        _profiler, self._previous = self._previous, None
+
+    def record(self, name, seconds, eliminated, solved):
+        """Add one call of a strategy to the statistics """
+        entry = self.stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'eliminated': 0, 'solved': 0})
+        entry['calls'] += 1
+        entry['seconds'] += seconds
+        entry['eliminated'] += eliminated
+        entry['solved'] += solved
+
+    def as_dict(self):
+        """Return the statistics, with the candidates eliminated per second of each strategy """
+        result = {}
+        for name, entry in self.stats.items():
+            result[name] = dict(entry)
+            result[name]['eliminated_per_second'] = entry['eliminated'] / entry['seconds'] if entry['seconds'] else 0.0
+        return result
+
+    def to_json(self, **kwargs):
+        """Return the statistics (see as_dict) as a JSON string """
+        return json.dumps(self.as_dict(), sort_keys=True, **kwargs)
+
+    def dump(self, path):
+        """Write the statistics (see as_dict) to a JSON file """
+        with open(path, 'w') as f:
+            f.write(self.to_json(indent=2))
+
+    def display(self):
+        """Print the statistics as a table, most productive strategy first """
+        print("{:<16}{:>8}{:>10}{:>12}{:>8}{:>12}".format(
+            'strategy', 'calls', 'seconds', 'eliminated', 'solved', 'elim/s'))
+        rows = sorted(self.as_dict().items(), key=lambda item: -item[1]['eliminated_per_second'])
+        for name, entry in rows:
+            print("{:<16}{calls:>8}{seconds:>10.3f}{eliminated:>12}{solved:>8}{eliminated_per_second:>12.0f}".format(
+                name, **entry))
+
+
+class Laps:
+    """Split one pass of interleaved strategies into per-strategy statistics
+
+    `start(name)` charges the time since the previous start to the previous
+    strategy, `count` adds candidates eliminated and boxes solved to the
+    current one, and `stop` records the totals in the profiler.
+    """
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.totals = {}
+        self.name = None
+        self.time = time.perf_counter()
+
+    def _entry(self):
+        return self.totals.setdefault(self.name, [0.0, 0, 0])
+
+    def start(self, name):
+        """Finish the current step and start one of the named strategy """
+        now = time.perf_counter()
+        if self.name is not None:
+            self._entry()[0] += now - self.time
+        self.name, self.time = name, now
+
+    def count(self, eliminated, solved):
+        """Credit the current strategy with eliminated candidates and solved boxes """
+        entry = self._entry()
+        entry[1] += eliminated
+        entry[2] += solved
+
+    def stop(self):
+        """Finish the current step and record every strategy used in the pass """
+        self.start(None)
+        for name, (seconds, eliminated, solved) in self.totals.items():
+            self.profiler.record(name, seconds, eliminated, solved)
+        self.totals = {}
+
+
+def laps():
+    """Return a Laps for the active Profiler, or None if profiling is off """
+    return Laps(_profiler) if _profiler is not None else None
+
+
+def _counts(values):
+    return sum(len(v) for v in values.values()), sum(len(v) == 1 for v in values.values())
+
+
+def profiled(name, strategy, values, *args):
+    """Call `strategy(values, *args)`, recording it if a Profiler is active
+
+    The strategy must update the values dictionary in place (all of the
+    strategies in solution.py and strategies.py do); its return value is
+    passed through.
+    """
+    if _profiler is None:
+        return strategy(values, *args)
+    candidates, solved = _counts(values)
+    start = time.perf_counter()
+    result = strategy(values, *args)
+    seconds = time.perf_counter() - start
+    candidates_after, solved_after = _counts(values)
+    _profiler.record(name, seconds, candidates - candidates_after, solved_after - solved)
+    return result
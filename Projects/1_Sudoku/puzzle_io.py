@@ -0,0 +1,148 @@
+"""Streaming reader and writer for newline-delimited puzzle files
+
+A puzzle file holds one grid string per line ('.' for an empty box), the same
+format that `grid2values` reads and `values2grid` writes. Blank lines and
+lines starting with '#' are comments. Files are processed one line at a time,
+so corpora with tens of millions of puzzles never have to fit in memory:
+
+    >>> with open_grids('solved.txt.gz', 'w') as out:
+    ...     write_grids(out, (solve(grid) for grid in read_grids('puzzles.txt.gz')))
+
+Paths ending in '.gz' are (de)compressed with gzip, and '-' stands for
+standard input or output.
+
+A puzzle without a solution is written as a placeholder grid of '-' (see
+`format_grid`), so that the n-th line of an output file always holds the
+result of the n-th puzzle of the input file, also when it is read back with
+`read_grids`.
+"""
+import gzip
+import mmap
+import sys
+
+from contextlib import nullcontext
+
+from utils import values2grid, boxes
+
+
+NO_SOLUTION = '-'  # every box of the placeholder grid of an unsolvable puzzle
+
+
+def open_grids(path, mode='r'):
+    """Open a puzzle file for reading ('r') or writing ('w') as text
+
+    Parameters
+    ----------
+    path(string)
+        path to the puzzle file; '.gz' files are compressed, and '-' is
+        standard input or output (which is left open)
+
+    mode(string)
+        'r' to read, 'w' to write or 'a' to append
+
+    Returns
+    -------
+    context manager
+        a context manager that returns the text file object
+    """
+    if path == '-':
+        return nullcontext(sys.stdin if mode == 'r' else sys.stdout)
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't')
+    return open(path, mode)
+
+
+def _lines(path, use_mmap):
+    if use_mmap and path != '-' and not path.endswith('.gz'):
+        with open(path, 'rb') as f:
+            # an empty file cannot be mapped, and has no lines anyway
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for line in iter(m.readline, b''):
+                    yield line.decode('ascii')
+        return
+    with open_grids(path) as f:
+        yield from f
+
+
+def read_grids(path, use_mmap=False):
+    """Lazily read the puzzles of a file, one grid string at a time
+
+    Parameters
+    ----------
+    path(string)
+        path to the puzzle file ('.gz' files are decompressed on the fly),
+        or '-' to read from standard input
+
+    use_mmap(bool)
+        memory-map the file instead of reading it through a buffered file
+        object; the pages are loaded by the OS on demand and can be shared
+        with other processes reading the same file (ignored for gzip files
+        and standard input)
+
+    Yields
+    ------
+    string
+        a string representing a sudoku grid
+    """
+    for line in _lines(path, use_mmap):
+        grid = line.strip()
+        if grid and not grid.startswith('#'):
+            yield grid
+
+
+def format_grid(result, geometry=None):
+    """Return the line written for a solver result
+
+    Parameters
+    ----------
+    result(dict, string or False)
+        a values dictionary, a grid string, or False for a puzzle without a solution
+
+    geometry(geometry.Geometry)
+        the geometry of values dictionaries (default: the 9x9 boxes of utils.py)
+
+    Returns
+    -------
+    string
+        the grid string, or a placeholder grid with NO_SOLUTION in every box
+        so that the input and output files stay aligned one-to-one
+    """
+    if not result:
+        return NO_SOLUTION * len(boxes if geometry is None else geometry.boxes)
+    if isinstance(result, dict):
+        return values2grid(result) if geometry is None else geometry.values2grid(result)
+    return result
+
+
+def is_solution(grid):
+    """Return False for the placeholder grid written for an unsolvable puzzle """
+    return not grid.startswith(NO_SOLUTION)
+
+
+def write_grids(f, results, geometry=None):
+    """Write solver results to an open puzzle file, one line per result
+
+    Parameters
+    ----------
+    f(file object)
+        a text file object, e.g. from `open_grids(path, 'w')`
+
+    results(iterable)
+        values dictionaries, grid strings or False (see `format_grid`); the
+        iterable is consumed lazily
+
+    geometry(geometry.Geometry)
+        the geometry of values dictionaries (see `format_grid`)
+
+    Returns
+    -------
+    int
+        the number of lines written
+    """
+    n = 0
+    for result in results:
+        f.write(format_grid(result, geometry) + '\n')
+        n += 1
+    return n
@@ -1,21 +1,41 @@
 
+from collections import deque
+from itertools import combinations
+
 from utils import *
+from dlx import ExactCover
+from geometry import standard_geometry
+from profiling import profiled, laps
+from strategies import (Occupancy, naked_pairs, naked_triples, naked_quads, hidden_pairs,
+                        hidden_triples, hidden_quads, pointing, claiming)
+
+
+# The unit and peer tables are computed once per geometry and cached; see
+# geometry.py for 16x16, 25x25, jigsaw and extra-unit variants
+geometry = standard_geometry(3, diagonal=True)
+digits = geometry.digits
+
+row_units = geometry.unitlist[:9]
+column_units = geometry.unitlist[9:18]
+square_units = geometry.unitlist[18:27]
+diag_units = geometry.unitlist[27:]
+unitlist = geometry.unitlist
+
+units = geometry.units
+peers = geometry.peers
+unit_ids = {box: [idx for idx, unit in enumerate(unitlist) if box in unit] for box in boxes}
+exact_cover = ExactCover(unitlist, digits, geometry.boxes)
 
 
-row_units = [cross(r, cols) for r in rows]
-column_units = [cross(rows, c) for c in cols]
-square_units = [cross(rs, cs) for rs in ('ABC', 'DEF', 'GHI') for cs in ('123', '456', '789')]
-unitlist = row_units + column_units + square_units
+class _CandidateMasks(dict):
+    """Bitmask of a candidate string (bit i set if digits[i] is a candidate),
+    computed the first time each string is seen """
+    def __missing__(self, value):
+        mask = self[value] = sum(1 << digits.index(digit) for digit in value)
+        return mask
 
-# TODO: Update the unit list to add the new diagonal units
-ul2br = [r + c for r, c in zip(rows, cols)]
-bl2ur = [r + c for r, c in zip(rows, cols[::-1])]
-diag_units = [ul2br, bl2ur]
-unitlist = unitlist + diag_units
 
-# Must be called after all units (including diagonals) are added to the unitlist
-units = extract_units(unitlist, boxes)
-peers = extract_peers(units, boxes)
+candidate_masks = _CandidateMasks()
 
 
 def naked_twins(values):
@@ -51,26 +71,24 @@ def naked_twins(values):
     strategy repeatedly).
     """
     # TODO: Implement this function!
-    twins = [box for box in values.keys() if len(values[box]) == 2]
-    pairs = set()
-    for twin in twins:
-        for peer in peers[twin]:
-            if peer in twins:
-                pairs.add((twin, peer))
-    naked_pairs = {}
-    for p1, p2 in pairs:
-        if values[p1] == values[p2] and (p2, p1) not in naked_pairs:
-            naked_pairs[(p1, p2)] = values[p1]
-    for (p1, p2), val in naked_pairs.items():
-        for unit in units[p1]:
-            if p2 not in unit:
+    # Group the two-digit boxes of each unit by value, so twins are found
+    # per unit instead of by comparing every bivalue box with all its peers.
+    # All twins are collected before any digit is removed.
+    bivalue = {}
+    for box, val in values.items():
+        if len(val) == 2:
+            for idx in unit_ids[box]:
+                bivalue.setdefault((idx, val), []).append(box)
+    naked = []
+    for (idx, val), twins in bivalue.items():
+        naked.extend((unitlist[idx], pair, val) for pair in combinations(twins, 2))
+    for unit, pair, val in naked:
+        for box in unit:
+            if box in pair:
                 continue
-            for box in unit:
-                if box == p1 or box == p2:
-                    continue
-                for digit in val:
-                    if digit in values[box]:
-                        values[box] = values[box].replace(digit, '')
+            for digit in val:
+                if digit in values[box]:
+                    values[box] = values[box].replace(digit, '')
     return values
 
 
@@ -121,14 +139,38 @@ def only_choice(values):
     """
     # TODO: Copy your code from the classroom to complete this function
     for unit in unitlist:
-        for digit in '123456789':
+        for digit in digits:
             dplaces = [box for box in unit if digit in values[box]]
             if len(dplaces) == 1:
                 values[dplaces[0]] = digit
     return values
 
 
-def reduce_puzzle(values):
+# Every strategy that reduce_puzzle and search can apply, as a function of the
+# values dictionary and an occupancy index (see strategies.py); the original
+# strategies above do not need the index.
+STRATEGIES = {
+    'naked_twins': lambda values, index: naked_twins(values),
+    'eliminate': lambda values, index: eliminate(values),
+    'only_choice': lambda values, index: only_choice(values),
+    'naked_pairs': naked_pairs,
+    'naked_triples': naked_triples,
+    'naked_quads': naked_quads,
+    'hidden_pairs': hidden_pairs,
+    'hidden_triples': hidden_triples,
+    'hidden_quads': hidden_quads,
+    'pointing': pointing,
+    'claiming': claiming,
+}
+DEFAULT_STRATEGIES = ('naked_twins', 'eliminate', 'only_choice')
+
+
+def occupancy(values):
+    """Build the unit-digit occupancy index of a board (see strategies.Occupancy) """
+    return Occupancy(values, unitlist, blocks=square_units)
+
+
+def reduce_puzzle(values, strategies=DEFAULT_STRATEGIES):
     """Reduce a Sudoku puzzle by repeatedly applying all constraint strategies
 
     Parameters
@@ -136,6 +178,9 @@ def reduce_puzzle(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    strategies(sequence)
+        the names of the STRATEGIES to apply in every round, in order
+
     Returns
     -------
     dict or False
@@ -143,23 +188,247 @@ def reduce_puzzle(values):
         no longer produces any changes, or False if the puzzle is unsolvable 
     """
     # TODO: Copy your code from the classroom and modify it to complete this function
-    solved_values = [box for box in values.keys() if len(values[box]) == 1]
+    # the index is only built (and kept in sync) if a strategy needs it; the
+    # subset and intersection strategies remove candidates without solving
+    # boxes, so progress is then measured in candidates instead of solved boxes
+    index = None if set(strategies) <= set(DEFAULT_STRATEGIES) else occupancy(values)
+    if index is None:
+        progress = lambda values: sum(len(v) == 1 for v in values.values())
+    else:
+        progress = lambda values: -sum(len(v) for v in values.values())
+    solved_values_after = progress(values)
+    recorder = tracing()
     stalled = False
     while not stalled:
-        solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
-        values = naked_twins(values)
-        values = eliminate(values)
-
-        values = only_choice(values)
-        solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
+        solved_values_before = solved_values_after
+        before = dict(values) if recorder is not None else None
+        for name in strategies:
+            values = profiled(name, STRATEGIES[name], values, index)
+            if index is not None and name in DEFAULT_STRATEGIES:
+                # the original strategies write to the board directly
+                index.sync(values)
+        solved_values_after = progress(values)
         stalled = solved_values_before == solved_values_after
-        display(values)
-        if len([box for box in values.keys() if len(values[box]) == 0]):
+        if recorder is not None:
+            recorder.record_round(before, values)
+        trace_round(values)
+        if not all(values.values()):
+            return False
+    return values
+
+
+def apply_strategies(values, strategies, trail=None, index=None):
+    """Apply each of the given strategies once
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    strategies(sequence)
+        the names of the STRATEGIES to apply, in order
+
+    trail(list)
+        if given, the previous (box, value) of every box that is changed is
+        appended to it (see propagate)
+
+    index(strategies.Occupancy)
+        the occupancy index of the board, kept in sync (built if not given)
+
+    Returns
+    -------
+    dict or False
+        the digits removed from each changed box, in the `removed` format of
+        propagate, or False if a box has no candidates left
+    """
+    index = occupancy(values) if index is None else index
+    recorder = tracing()
+    before = dict(values) if recorder is not None else None
+    # the index logs the previous value of every box it changes, so the
+    # changes are known without comparing the whole board
+    log = index.trail = []
+    for name in strategies:
+        profiled(name, STRATEGIES[name], values, index)
+        if name in DEFAULT_STRATEGIES:
+            # the original strategies write to the board directly
+            index.sync(values)
+    index.trail = None
+    previous = {}
+    for box, value in log:
+        previous.setdefault(box, value)
+    removed = {box: ''.join(d for d in old if d not in values[box]) for box, old in previous.items()}
+    if trail is not None:
+        trail.extend(previous.items())
+    if recorder is not None:
+        recorder.record_round(before, values)
+    trace_round(values)
+    if not all(values[box] for box in removed):
+        return False
+    return removed
+
+
+def propagate(values, removed=None, trail=None):
+    """Reduce a Sudoku puzzle by incremental (AC-3 style) constraint propagation
+
+    Instead of sweeping the whole board with every strategy until nothing
+    changes, keep work queues of the boxes that lost candidates and of the
+    (unit, digit) pairs whose possible places shrank, and only revisit those.
+    Processing a box applies eliminate (single value) or naked twins (two
+    values) to its peers; processing a (unit, digit) pair applies only choice.
+    Propagation stops at the first contradiction -- an empty box or a digit
+    with no place left in a unit.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    removed(dict)
+        a dictionary of the form {'box_name': '4567', ...} holding the digits
+        removed from each box since the board was last propagated; by default
+        every box and every unit is checked, which is what a new grid needs
+
+    trail(list)
+        if given, the previous (box, value) of every box that is changed is
+        appended to it so the changes can be rolled back with `undo`
+
+    Returns
+    -------
+    dict or False
+        The values dictionary once the queues are empty, or False if the
+        puzzle is unsolvable
+    """
+    box_queue = deque(boxes if removed is None else removed)
+    queued_boxes = set(box_queue)
+    if removed is None:
+        unit_queue = deque((idx, digit) for idx in range(len(unitlist)) for digit in digits)
+    else:
+        unit_queue = deque((idx, digit) for box, digits in removed.items()
+                           for idx in unit_ids[box] for digit in digits)
+    queued_units = set(unit_queue)
+    recorder = tracing()
+    before = dict(values) if recorder is not None else None
+    timer = laps()
+
+    def discard(box, digits):
+        """Remove digits from a box and schedule the follow-up work """
+        value = values[box]
+        lost = [d for d in digits if d in value]
+        if not lost:
+            return True
+        value = ''.join(d for d in value if d not in lost)
+        if not value:
+            return False
+        if trail is not None:
+            trail.append((box, values[box]))
+        values[box] = value
+        if timer is not None:
+            timer.count(len(lost), len(value) == 1)
+        if box not in queued_boxes:
+            queued_boxes.add(box)
+            box_queue.append(box)
+        for idx in unit_ids[box]:
+            for digit in lost:
+                if (idx, digit) not in queued_units:
+                    queued_units.add((idx, digit))
+                    unit_queue.append((idx, digit))
+        return True
+
+    def drain():
+        """Process the box queue until it is empty; False on a contradiction """
+        while box_queue:
+            box = box_queue.popleft()
+            queued_boxes.discard(box)
+            value = values[box]
+            if len(value) == 1:
+                if timer is not None:
+                    timer.start('eliminate')
+                for peer in peers[box]:
+                    if not discard(peer, value):
+                        return False
+            elif len(value) == 2:
+                if timer is not None:
+                    timer.start('naked_twins')
+                for unit in units[box]:
+                    twins = [other for other in unit if values[other] == value]
+                    if len(twins) > 2:
+                        return False
+                    if len(twins) == 2:
+                        for other in unit:
+                            if other not in twins and not discard(other, value):
+                                return False
+        return True
+
+    # box work always comes first; a round checks the (unit, digit) pairs
+    # that were queued when it started (the pairs queued while it runs are
+    # checked in the next round)
+    try:
+        if not drain():
             return False
+        while unit_queue:
+            for _ in range(len(unit_queue)):
+                if timer is not None:
+                    timer.start('only_choice')
+                idx, digit = unit_queue.popleft()
+                queued_units.discard((idx, digit))
+                places = [box for box in unitlist[idx] if digit in values[box]]
+                if not places:
+                    return False
+                box = places[0]
+                if len(places) == 1 and len(values[box]) > 1:
+                    if not discard(box, values[box].replace(digit, '')) or not drain():
+                        return False
+            trace_round(values)
+    finally:
+        if timer is not None:
+            timer.stop()
+    if recorder is not None:
+        recorder.record_round(before, values)
     return values
 
 
-def search(values):
+def propagate_with(values, strategies, removed=None, trail=None, index=None):
+    """Propagate (see propagate), then alternate the given strategies with
+    propagation until neither removes any more candidates.
+
+    The strategies work on an occupancy index that follows the board: it
+    catches up with the boxes in `removed`, and then with the boxes that
+    propagation logs on the trail, instead of being rebuilt.
+
+    Parameters
+    ----------
+    index(strategies.Occupancy)
+        the occupancy index of the board as it was before the changes in
+        `removed` (built if not given); on success it is in sync with the
+        board, on failure it is only in sync with the boxes on the trail
+
+    Returns
+    -------
+    dict or False
+        The values dictionary, or False if the puzzle is unsolvable
+    """
+    if not strategies:
+        return propagate(values, removed, trail)
+    trail = [] if trail is None else trail
+    if index is None:
+        index = occupancy(values)
+    else:
+        index.sync(values, removed)
+    start = len(trail)
+    values = propagate(values, removed, trail)
+    while values is not False:
+        index.sync(values, [box for box, _ in trail[start:]])
+        removed = apply_strategies(values, strategies, trail, index)
+        if removed is False:
+            return False
+        if not removed:
+            break
+        start = len(trail)
+        values = propagate(values, removed, trail)
+    return values
+
+
+def search(values, removed=None, strategies=(), stats=None, cache=None, index=None, trail=None):
     """Apply depth first search to solve Sudoku puzzles in order to solve puzzles
     that cannot be solved by repeated reduction alone.
 
@@ -168,6 +437,33 @@ def search(values):
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    removed(dict)
+        the digits removed from each box since the board was last reduced (see
+        propagate); by default the whole board is reduced
+
+    strategies(sequence)
+        names of extra STRATEGIES (e.g. 'hidden_pairs', 'pointing') to apply
+        at every node once propagation stalls (see propagate_with)
+
+    stats(dict)
+        if given, stats['nodes'] is incremented for every node expanded
+
+    cache(cache.LRUCache)
+        if given, the result of every branching state (the solution below
+        it, or False for a dead end) is stored under the strategies and its
+        `state_key`, and looked up before the state is searched again; the
+        strategies are part of the key because they can change which of
+        several solutions is found first
+
+    index(strategies.Occupancy)
+        the occupancy index used by the extra strategies, shared by the whole
+        search (see propagate_with)
+
+    trail(list)
+        the boxes changed below the current node, logged while there are
+        extra strategies so that the shared index can catch up with the
+        board of a node after one of its branches fails
+
     Returns
     -------
     dict or False
@@ -179,32 +475,197 @@ def search(values):
     and extending it to call the naked twins strategy.
     """
     # TODO: Copy your code from the classroom to complete this function
-    # First, reduce the puzzle using the previous function
-    values = reduce_puzzle(values)
+    # First, reduce the puzzle; only the boxes touched by the last branch
+    # assignment need to be revisited (see propagate)
+    if stats is not None:
+        stats['nodes'] = stats.get('nodes', 0) + 1
+    if strategies:
+        index = occupancy(values) if index is None else index
+        trail = [] if trail is None else trail
+    values = propagate_with(values, strategies, removed, trail, index)
     if values is False:
         return False
     if all(len(values[s]) == 1 for s in boxes):
         return values
+    if cache is not None:
+        key = (tuple(strategies), state_key(values))
+        found = cache.get(key)
+        if found is not None:
+            return found and _cached_solution(values, found)
     # Choose one of the unfilled squares with the fewest possibilities
     n, s = min((len(values[s]), s) for s in boxes if len(values[s]) > 1)
 
-    target_box = ('', 9)
-    for key, value in values.items():
-        if len(value) == 1:
-            continue
-        if len(value) < target_box[1]:
-            target_box = (key, len(value))
-
     # Now use recursion to solve each one of the resulting sudokus, and if one returns a value (not False), return that answer!
+    recorder = tracing()
     for value in values[s]:
+        mark = len(recorder) if recorder is not None else 0
+        step = len(trail) if trail is not None else 0
         new_sudoku = values.copy()
-        new_sudoku[s] = value
-        attempt = search(new_sudoku)
+        assign_value(new_sudoku, s, value)
+        attempt = search(new_sudoku, {s: values[s].replace(value, '')}, strategies, stats, cache,
+                         index, trail)
         if attempt:
+            if cache is not None:
+                cache.put(key, values2grid(attempt))
             return attempt
+        if recorder is not None:
+            recorder.rewind(mark)
+        if index is not None:
+            # the branch changed a copy of the board; bring the index back
+            index.sync(values, [s] + [box for box, _ in trail[step:]])
+            del trail[step:]
+    if cache is not None:
+        cache.put(key, False)
+    return False
+
+
+def _cached_solution(values, grid):
+    """Return the board of a cached solution grid, recording the boxes it
+    solves if a Recorder is active (the search below values is skipped)"""
+    solved = grid2values(grid)
+    recorder = tracing()
+    if recorder is not None:
+        recorder.record_round(values, solved)
+    return solved
+
+
+def state_key(values):
+    """Return a compact, hashable key for the candidates of every box: the
+    tuple of their bitmasks (see candidate_masks) """
+    return tuple([candidate_masks[values[box]] for box in boxes])
+
+
+def undo(values, trail, mark, index=None):
+    """Roll the board back to the state it had when the trail was `mark` entries long
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    trail(list)
+        the (box, previous value) log written by `propagate` and `search_inplace`
+
+    mark(int)
+        the length of the trail at the point to return to
+
+    index(strategies.Occupancy)
+        if given, the index is brought back in sync with the restored boxes
+    """
+    restored = []
+    while len(trail) > mark:
+        box, value = trail.pop()
+        values[box] = value
+        restored.append(box)
+    if index is not None:
+        index.sync(values, restored)
+    return values
+
+
+def search_inplace(values, removed=None, trail=None, strategies=(), index=None):
+    """Depth first search that mutates a single board instead of copying it
+
+    Every change made while propagating a branch is logged on the trail, and a
+    failed branch is undone by replaying the trail backwards, so no board
+    copies are allocated no matter how deep the search tree gets.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}; it is solved
+        in place, or left unchanged if there is no solution
+
+    removed(dict)
+        the digits removed from each box since the board was last reduced (see
+        propagate); by default the whole board is reduced
+
+    trail(list)
+        the undo log shared by the whole search (created if not given)
+
+    strategies(sequence)
+        names of extra STRATEGIES to apply at every node (see search)
+
+    index(strategies.Occupancy)
+        the occupancy index used by the extra strategies, shared by the whole
+        search and kept in sync through the trail (built if needed)
+
+    Returns
+    -------
+    dict or False
+        The values dictionary with all boxes assigned or False
+    """
+    trail = [] if trail is None else trail
+    if strategies and index is None:
+        index = occupancy(values)
+    mark = len(trail)
+    if propagate_with(values, strategies, removed, trail, index) is False:
+        undo(values, trail, mark, index)
+        return False
+    unsolved = [(len(values[s]), s) for s in boxes if len(values[s]) > 1]
+    if not unsolved:
+        return values
+    # Choose one of the unfilled squares with the fewest possibilities
+    n, s = min(unsolved)
+    options = values[s]
+    recorder = tracing()
+    for value in options:
+        step = len(recorder) if recorder is not None else 0
+        trail.append((s, options))
+        assign_value(values, s, value)
+        if search_inplace(values, {s: options.replace(value, '')}, trail, strategies, index):
+            return values
+        # the failed branch already rolled back its own propagation
+        undo(values, trail, len(trail) - 1, index)
+        if recorder is not None:
+            recorder.rewind(step)
+    undo(values, trail, mark, index)
+    return False
+
 
+SEARCHES = {'search': search, 'inplace': search_inplace, 'dlx': exact_cover.search}
+
+
+def count_solutions(grid, limit=None):
+    """Count the solutions of a Sudoku puzzle with the exact cover backend
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    limit(int)
+        stop counting once this many solutions have been found
+
+    Returns
+    -------
+    int
+        The number of solutions (at most `limit`)
+    """
+    return exact_cover.count(grid2values(grid), limit)
 
-def solve(grid):
+
+def has_unique_solution(grid):
+    """Return True if the Sudoku puzzle has exactly one solution """
+    return exact_cover.is_unique(grid2values(grid))
+
+
+def iter_solutions(grid):
+    """Lazily enumerate every solution of a Sudoku puzzle
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    Yields
+    ------
+    dict
+        The dictionary representation of each solved sudoku grid
+    """
+    return exact_cover.solutions(grid2values(grid))
+
+
+def solve(grid, backend='search', strategies=(), cache=None):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
@@ -214,20 +675,50 @@ def solve(grid):
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+    backend(string)
+        the search to use: 'search' (copy the board for every branch),
+        'inplace' (backtrack on one board with a trail, see search_inplace) or
+        'dlx' (exact cover with Algorithm X, see dlx.ExactCover)
+
+    strategies(sequence)
+        names of extra STRATEGIES to apply at every search node; not used by
+        the 'dlx' backend
+
+    cache(cache.LRUCache)
+        if given, solutions are stored by grid string, backend and strategies
+        and a repeated puzzle is answered from the cache (the configuration is
+        part of the key because a puzzle with several solutions may be solved
+        differently by each one); the 'search' backend also caches the
+        results of its branching states (see search)
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
     """
+    strategies = tuple(strategies) if backend != 'dlx' else ()
+    key = (grid, backend, strategies)
+    if cache is not None:
+        found = cache.get(key)
+        if found is not None:
+            return found and _cached_solution(grid2values(grid), found)
     values = grid2values(grid)
-    values = search(values)
+    kwargs = {}
+    if strategies:
+        kwargs['strategies'] = strategies
+    if cache is not None and backend == 'search':
+        kwargs['cache'] = cache
+    values = SEARCHES[backend](values, **kwargs)
+    if cache is not None:
+        cache.put(key, values and values2grid(values))
     return values
 
 
 if __name__ == "__main__":
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
+    with Recorder(verbose=True) as history:
+        result = solve(diag_sudoku_grid)
     display(result)
 
     try:
@@ -0,0 +1,253 @@
+"""Subset and intersection strategies over a unit-digit occupancy index
+
+The strategies in solution.py look digits up box by box. The ones below work
+from an `Occupancy` index instead, which maps every unit and digit to the set
+of boxes of that unit where the digit can still go, and the candidates of
+every box, and which is kept up to date as candidates are removed. All of
+them take the values dictionary and the index, and return the values
+dictionary; solution.reduce_puzzle and solution.search can apply any
+combination of them (see solution.STRATEGIES).
+
+    >>> index = Occupancy(values, unitlist, blocks=square_units)
+    >>> values = hidden_pairs(values, index)
+"""
+from collections import defaultdict
+from itertools import combinations
+
+
+class Occupancy:
+    """Index of the boxes where each digit can still go, per unit
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    unitlist(list)
+        a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+    blocks(list)
+        the units of `unitlist` that are blocks (used to tell pointing from
+        claiming)
+
+    Attributes
+    ----------
+    places : list
+        one dict per unit in `unitlist`, mapping each digit to the set of
+        boxes of the unit that still allow it
+
+    candidates : dict
+        the candidate digits of every box, as a frozenset
+
+    trail : list
+        if not None, the previous (box, value) of every box that the index
+        changes or catches up with is appended to it (see solution.propagate)
+
+    The index can live alongside a board for a whole search: the strategies
+    below update it as they remove candidates, and after the board has been
+    changed behind its back (by other strategies, or by undoing a branch),
+    `sync` catches up with the boxes that changed.
+    """
+    def __init__(self, values, unitlist, blocks=()):
+        self.unitlist = unitlist
+        self.blocks = [idx for idx, unit in enumerate(unitlist) if unit in blocks]
+        self.lines = [idx for idx, unit in enumerate(unitlist) if unit not in blocks]
+        self.unit_ids = defaultdict(set)
+        self.places = [defaultdict(set) for _ in unitlist]
+        for idx, unit in enumerate(unitlist):
+            for box in unit:
+                self.unit_ids[box].add(idx)
+                for digit in values[box]:
+                    self.places[idx][digit].add(box)
+        self.values = dict(values)
+        self.candidates = {box: frozenset(value) for box, value in values.items()}
+        self.trail = None
+
+    def _update(self, box, old, new):
+        for idx in self.unit_ids[box]:
+            places = self.places[idx]
+            for digit in old:
+                if digit not in new:
+                    places[digit].discard(box)
+            for digit in new:
+                if digit not in old:
+                    places[digit].add(box)
+        self.values[box] = new
+        self.candidates[box] = frozenset(new)
+        if self.trail is not None:
+            self.trail.append((box, old))
+
+    def sync(self, values, boxes=None):
+        """Update the index for the boxes that were changed behind its back
+
+        Parameters
+        ----------
+        values(dict)
+            the board
+
+        boxes(iterable)
+            the boxes that may have changed since the index was last in sync
+            (e.g. the boxes of a trail); by default every box is compared
+        """
+        indexed = self.values
+        for box in (indexed if boxes is None else boxes):
+            old = indexed[box]
+            if values[box] != old:
+                self._update(box, old, values[box])
+
+    def discard(self, values, box, digits):
+        """Remove digits from the candidates of a box and update the index """
+        old = values[box]
+        new = ''.join(d for d in old if d not in digits)
+        if new != old:
+            values[box] = new
+            self._update(box, old, new)
+
+
+def naked_subsets(values, index, size):
+    """Eliminate values using the naked subset strategy
+
+    If `size` unsolved boxes of a unit only allow `size` digits between them,
+    those digits must go in those boxes and can be removed from every other
+    box of the unit.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    index(Occupancy)
+        the occupancy index of values
+
+    size(int)
+        the number of boxes in a subset (2 for pairs, 3 for triples, ...)
+
+    Returns
+    -------
+    dict
+        The values dictionary with the naked subsets eliminated from their units
+    """
+    candidates = index.candidates
+    for unit in index.unitlist:
+        small = [box for box in unit if 1 < len(candidates[box]) <= size]
+        for subset in combinations(small, size):
+            digits = frozenset().union(*(candidates[box] for box in subset))
+            if len(digits) == size:
+                for box in unit:
+                    if box not in subset:
+                        index.discard(values, box, digits)
+    return values
+
+
+def hidden_subsets(values, index, size):
+    """Eliminate values using the hidden subset strategy
+
+    If `size` digits can only go in the same `size` boxes of a unit, those
+    boxes must hold those digits and every other digit can be removed from them.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    index(Occupancy)
+        the occupancy index of values
+
+    size(int)
+        the number of digits in a subset (2 for pairs, 3 for triples, ...)
+
+    Returns
+    -------
+    dict
+        The values dictionary with the other digits removed from the hidden subsets
+    """
+    for places in index.places:
+        digits = sorted(d for d, boxes in places.items() if 1 < len(boxes) <= size)
+        for subset in combinations(digits, size):
+            boxes = set().union(*(places[d] for d in subset))
+            if len(boxes) == size:
+                for box in boxes:
+                    index.discard(values, box, [d for d in values[box] if d not in subset])
+    return values
+
+
+def _intersections(values, index, unit_ids):
+    for idx in unit_ids:
+        for digit, boxes in index.places[idx].items():
+            if len(boxes) < 2:
+                continue
+            boxes = list(boxes)
+            shared = set.intersection(*(index.unit_ids[box] for box in boxes)) - {idx}
+            for other in shared:
+                for box in index.unitlist[other]:
+                    if box not in boxes:
+                        index.discard(values, box, digit)
+    return values
+
+
+def pointing(values, index):
+    """Eliminate values using the pointing strategy
+
+    If every place left for a digit in a block lies on one row, column or
+    diagonal, the digit can be removed from the rest of that line.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    index(Occupancy)
+        the occupancy index of values
+
+    Returns
+    -------
+    dict
+        The values dictionary with the pointing digits removed from their lines
+    """
+    return _intersections(values, index, index.blocks)
+
+
+def claiming(values, index):
+    """Eliminate values using the claiming (box/line reduction) strategy
+
+    If every place left for a digit in a row, column or diagonal lies in one
+    block, the digit can be removed from the rest of that block.
+
+    Parameters
+    ----------
+    values(dict)
+        a dictionary of the form {'box_name': '123456789', ...}
+
+    index(Occupancy)
+        the occupancy index of values
+
+    Returns
+    -------
+    dict
+        The values dictionary with the claimed digits removed from their blocks
+    """
+    return _intersections(values, index, index.lines)
+
+
+def naked_pairs(values, index):
+    return naked_subsets(values, index, 2)
+
+
+def naked_triples(values, index):
+    return naked_subsets(values, index, 3)
+
+
+def naked_quads(values, index):
+    return naked_subsets(values, index, 4)
+
+
+def hidden_pairs(values, index):
+    return hidden_subsets(values, index, 2)
+
+
+def hidden_triples(values, index):
+    return hidden_subsets(values, index, 3)
+
+
+def hidden_quads(values, index):
+    return hidden_subsets(values, index, 4)
@@ -0,0 +1,162 @@
+"""Symmetry canonicalization for diagonal Sudoku puzzles
+
+Two puzzles are equivalent if one can be turned into the other by a board
+transformation that maps every unit (row, column, square and both diagonals)
+onto a unit, followed by a relabeling of the digits. Equivalent puzzles have
+equivalent solutions, so only one of them ever needs to be solved.
+
+The board transformations of diagonal Sudoku are generated by
+
+- the 8 symmetries of the square (rotations, transposes and flips), and
+- applying the same permutation to the rows and to the columns, as long as it
+  maps bands to bands and commutes with the reflection i -> 8 - i (so both
+  diagonals are kept): the two outer bands may be swapped and the rows of an
+  outer band permuted (with the other outer band mirrored), and the two outer
+  rows of the middle band may be swapped.
+
+`canonical_form` applies every transformation, relabels the digits of each
+result in order of first appearance, and returns the smallest grid string;
+`solve` solves that representative (optionally through a cache shared by all
+the equivalent puzzles) and maps its solution back.
+"""
+from itertools import permutations
+
+import solution
+from utils import grid2values, values2grid
+
+
+SIZE = 9
+DIGITS = '123456789'
+
+
+def _square_symmetries():
+    last = SIZE - 1
+    return [
+        lambda r, c: (r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (last - r, c),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - c, last - r),
+    ]
+
+
+def _line_permutations():
+    """Permutations of 0..8 that keep bands together and commute with i -> 8 - i """
+    result = []
+    for swap_outer in (False, True):
+        for order in permutations(range(3)):
+            for swap_middle in (False, True):
+                first = [6 + (2 - i) for i in order] if swap_outer else list(order)
+                middle = [5, 4, 3] if swap_middle else [3, 4, 5]
+                result.append(first + middle + [SIZE - 1 - i for i in reversed(first)])
+    return result
+
+
+def _transforms():
+    """Every distinct board transformation, as a tuple `cells` such that cell
+    i of the transformed grid is cell cells[i] of the original grid.
+    """
+    transforms = set()
+    for square in _square_symmetries():
+        for perm in _line_permutations():
+            cells = []
+            for r in range(SIZE):
+                for c in range(SIZE):
+                    r0, c0 = square(perm[r], perm[c])
+                    cells.append(r0 * SIZE + c0)
+            transforms.add(tuple(cells))
+    return sorted(transforms)
+
+
+TRANSFORMS = _transforms()
+
+
+def _relabel(grid):
+    """Map the digits of a grid to 1, 2, ... in order of first appearance
+    (digits that do not appear keep their relative order at the end)
+    """
+    mapping = {}
+    for val in grid:
+        if val != '.' and val not in mapping:
+            mapping[val] = DIGITS[len(mapping)]
+    for val in DIGITS:
+        if val not in mapping:
+            mapping[val] = DIGITS[len(mapping)]
+    return mapping
+
+
+def canonical_form(grid):
+    """Return the canonical representative of a puzzle and how to get there
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+        Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    Returns
+    -------
+    tuple
+        (canonical grid string, transform) where the transform is the pair
+        (cells, digit mapping) to pass to `transform_grid` and `restore_grid`;
+        all equivalent puzzles have the same canonical grid string
+    """
+    best = None
+    for cells in TRANSFORMS:
+        moved = ''.join(grid[i] for i in cells)
+        mapping = _relabel(moved)
+        candidate = ''.join(mapping.get(val, val) for val in moved)
+        if best is None or candidate < best[0]:
+            best = (candidate, (cells, mapping))
+    return best
+
+
+def transform_grid(grid, transform):
+    """Apply a transform returned by `canonical_form` to a grid string """
+    cells, mapping = transform
+    return ''.join(mapping.get(grid[i], grid[i]) for i in cells)
+
+
+def restore_grid(grid, transform):
+    """Undo a transform returned by `canonical_form` on a grid string """
+    cells, mapping = transform
+    inverse = {new: old for old, new in mapping.items()}
+    result = [None] * len(cells)
+    for i, src in enumerate(cells):
+        result[src] = inverse.get(grid[i], grid[i])
+    return ''.join(result)
+
+
+def solve(grid, cache=None, backend='search', strategies=()):
+    """Solve a puzzle through its canonical form
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid.
+
+    cache(cache.LRUCache)
+        if given, solutions are stored by canonical grid string (and solver
+        configuration, see `solution.solve`), so every puzzle equivalent to
+        one that was already solved the same way is a cache hit
+
+    backend(string)
+        the search backend of `solution.solve`
+
+    strategies(sequence)
+        the extra strategies of `solution.solve`
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    canonical, transform = canonical_form(grid)
+    values = solution.solve(canonical, backend, strategies, cache=cache)
+    if not values:
+        return False
+    return grid2values(restore_grid(values2grid(values), transform))
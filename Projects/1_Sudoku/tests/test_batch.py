@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+import batch
+from tests import test_solution
+
+
+class TestBatch(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+    unsolvable_grid = '11' + '.' * 79
+
+    def setUp(self):
+        values = test_solution.TestDiagonalSudoku.solved_diag_sudoku
+        self.solved_grid = batch.values2grid(values)
+
+    def test_solve_many_in_process(self):
+        results = list(batch.solve_many([self.diagonal_grid, self.unsolvable_grid], workers=1))
+        self.assertEqual(results, [(self.diagonal_grid, self.solved_grid), (self.unsolvable_grid, False)])
+
+    def test_solve_many_pool(self):
+        grids = [self.diagonal_grid, self.unsolvable_grid] * 3
+        results = list(batch.solve_many(grids, workers=2, chunksize=1))
+        self.assertEqual([grid for grid, _ in results], grids)
+        unordered = list(batch.solve_many(grids, workers=2, chunksize=1, ordered=False))
+        self.assertEqual(sorted(unordered), sorted(results))
+
+    def test_read_grids(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'puzzles.txt')
+            with open(path, 'w') as f:
+                f.write('# diagonal puzzles\n\n{}\n{}\n'.format(self.diagonal_grid, self.unsolvable_grid))
+            self.assertEqual(list(batch.read_grids(path)), [self.diagonal_grid, self.unsolvable_grid])
+
+
+if __name__ == '__main__':
+    unittest.main()
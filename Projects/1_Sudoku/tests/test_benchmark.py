@@ -0,0 +1,55 @@
+import unittest
+
+import benchmark
+import solution
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_report(self):
+        report = benchmark.benchmark(['easy', 'diagonal'], ['solve', 'bitboard'], limit=2)
+        # the dict engine only handles the diagonal geometry
+        self.assertEqual(set(report['easy']), {'bitboard'})
+        result = report['diagonal']['solve']
+        self.assertEqual(result['puzzles'], 2)
+        self.assertEqual(result['nodes'], report['diagonal']['bitboard']['nodes'])
+        self.assertTrue(result['nodes'] >= 1 and result['rate'] > 0)
+        self.assertAlmostEqual(result['score'] / result['rate'],
+                               report['diagonal']['bitboard']['score'] / report['diagonal']['bitboard']['rate'])
+
+    def test_rounds(self):
+        # rounds are propagation rounds, not calls of the propagation functions
+        grids, geometry = benchmark.load_set('hard', 5)
+        result = benchmark.run(benchmark.TARGETS['bitboard'](geometry), grids, geometry, repeat=1)
+        self.assertGreater(result['rounds'], result['nodes'])
+        result = benchmark.run(benchmark.TARGETS['propagate'](solution.geometry), [test_grid],
+                               solution.geometry, repeat=1)
+        self.assertGreater(result['rounds'], 1)
+
+    def test_counting_restores(self):
+        search, searches = solution.search, dict(solution.SEARCHES)
+        with benchmark.counting(solution.geometry) as counts:
+            solution.solve(test_grid)
+        self.assertGreater(counts['nodes'], 0)
+        self.assertIs(solution.search, search)
+        self.assertEqual(solution.SEARCHES, searches)
+
+    def test_compare(self):
+        base = {'hard': {'dlx': {'rate': 100.0, 'score': 2.0, 'nodes': 10.0, 'rounds': 0.0}}}
+        same = {'hard': {'dlx': {'rate': 90.0, 'score': 1.8, 'nodes': 10.0, 'rounds': 0.0}}}
+        slow = {'hard': {'dlx': {'rate': 100.0, 'score': 1.0, 'nodes': 20.0, 'rounds': 0.0}}}
+        # a slower machine: the rate drops, the score does not
+        other = {'hard': {'dlx': {'rate': 50.0, 'score': 2.0, 'nodes': 10.0, 'rounds': 0.0}}}
+        self.assertEqual(benchmark.compare(same, base, 0.25), [])
+        self.assertEqual(len(benchmark.compare(slow, base, 0.25)), 2)
+        self.assertEqual(benchmark.compare(other, base, 0.25), [])
+        # baselines without scores compare the rates
+        del base['hard']['dlx']['score']
+        self.assertEqual(len(benchmark.compare(other, base, 0.25)), 1)
+
+
+test_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import bitboard
+import solution
+from tests import test_solution
+
+
+class TestBitboard(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = test_solution.TestDiagonalSudoku.solved_diag_sudoku
+    # needs search
+    expert_grid = '...6..1.44..5....21...7.6..84...5....9.........1...54.....69......2..7...........'
+
+    def test_round_trip(self):
+        masks = bitboard.grid2masks(self.diagonal_grid)
+        self.assertEqual(bitboard.masks2grid(masks), self.diagonal_grid)
+        self.assertEqual(bitboard.masks2values(masks), solution.grid2values(self.diagonal_grid))
+
+    def test_solve(self):
+        self.assertEqual(bitboard.solve(self.diagonal_grid), self.solved_diag_sudoku)
+
+    def test_unsolvable(self):
+        self.assertFalse(bitboard.solve('11' + '.' * 79))
+
+    def test_reduce_matches_solution(self):
+        for grid in [self.diagonal_grid, self.expert_grid]:
+            masks = bitboard.reduce_puzzle(bitboard.grid2masks(grid))
+            self.assertEqual(bitboard.masks2values(masks), solution.propagate(solution.grid2values(grid)))
+
+    def test_undo(self):
+        engine = bitboard._default
+        masks = engine.reduce_puzzle(bitboard.grid2masks(self.expert_grid))
+        before, trail = masks[:], []
+        idx = next(i for i, mask in enumerate(masks) if engine.count(mask) > 1)
+        trail.append((idx, masks[idx]))
+        masks[idx] &= -masks[idx]
+        engine.reduce_puzzle(masks, [idx], trail)
+        self.assertNotEqual(masks, before)
+        engine.undo(masks, trail, 0)
+        self.assertEqual(masks, before)
+        self.assertEqual(trail, [])
+
+    def test_search_failure_restores_board(self):
+        # a failed branch leaves the board as its parent node had it
+        grid = self.expert_grid
+        engine = bitboard._default
+        masks = engine.reduce_puzzle(bitboard.grid2masks(grid))
+        idx = min((engine.count(mask), i) for i, mask in enumerate(masks) if engine.count(mask) > 1)[1]
+        solved = bitboard.search(bitboard.grid2masks(grid))
+        for bit in (1 << i for i in range(9)):
+            if masks[idx] & bit and not solved[idx] & bit:
+                before, trail = masks[:], [(idx, masks[idx])]
+                masks[idx] = bit
+                self.assertFalse(engine.search(masks, [idx], trail))
+                engine.undo(masks, trail, 0)
+                self.assertEqual(masks, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import solution
+from cache import LRUCache
+from tests import test_solution
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_eviction_order(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.cache_info(), (1, 1, 2, 2, 1))
+        self.assertEqual(cache.hit_rate(), 0.5)
+
+    def test_solve(self):
+        grid = test_solution.TestDiagonalSudoku.diagonal_grid
+        cache = LRUCache()
+        first = solution.solve(grid, cache=cache)
+        second = solution.solve(grid, cache=cache)
+        self.assertEqual(first, test_solution.TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(second, first)
+        self.assertIsNot(second, first)
+        self.assertEqual(cache.get((grid, 'search', ())), solution.values2grid(first))
+        self.assertFalse(solution.solve('11' + '.' * 79, cache=cache))
+        self.assertIs(cache.get(('11' + '.' * 79, 'search', ())), False)
+
+    def test_solve_configurations(self):
+        grid = test_solution.TestDiagonalSudoku.diagonal_grid
+        cache = LRUCache()
+        solution.solve(grid, cache=cache)
+        solution.solve(grid, 'dlx', cache=cache)
+        solution.solve(grid, strategies=['hidden_pairs'], cache=cache)
+        self.assertEqual(cache.hits, 0)
+        solution.solve(grid, 'dlx', ['hidden_pairs'], cache=cache)
+        self.assertEqual(cache.hits, 1)
+
+    def test_state_key(self):
+        values = solution.grid2values(test_solution.TestDiagonalSudoku.diagonal_grid)
+        key = solution.state_key(values)
+        self.assertEqual(len(key), 81)
+        self.assertEqual(key[0], 0b10)
+        self.assertEqual(key[1], 0b111111111)
+        values['A2'] = '13'
+        self.assertEqual(solution.state_key(values)[1], 0b101)
+
+    def test_search_states(self):
+        grid = '...6..1.44..5....21...7.6..84...5....9.........1...54.....69......2..7...........'
+        cache = LRUCache()
+        result = solution.search(solution.grid2values(grid), cache=cache)
+        self.assertGreater(len(cache), 0)
+        # every cached branching state is a dead end or leads to the solution
+        self.assertTrue(all(v is False or v == solution.values2grid(result) for v in cache.data.values()))
+        self.assertTrue(all(strategies == () and len(key) == 81 for strategies, key in cache.data))
+        stats = {}
+        self.assertEqual(solution.search(solution.grid2values(grid), stats=stats, cache=cache), result)
+        self.assertEqual(stats['nodes'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import random
+import time
+import unittest
+
+import generator
+import solution
+from tests import test_solution
+
+
+class TestGenerator(unittest.TestCase):
+    expert_grid = '...6..1.44..5....21...7.6..84...5....9.........1...54.....69......2..7...........'
+
+    def test_random_solution(self):
+        grid = generator.random_solution(random.Random(0))
+        values = solution.grid2values(grid)
+        for unit in solution.unitlist:
+            self.assertEqual(sorted(values[box] for box in unit), list(solution.digits))
+
+    def test_make_puzzle_unique(self):
+        grid = generator.make_puzzle(random.Random(1))
+        self.assertTrue(solution.has_unique_solution(grid))
+        # minimal: every clue is needed
+        idx = grid.index(next(val for val in grid if val != '.'))
+        self.assertFalse(solution.has_unique_solution(grid[:idx] + '.' + grid[idx + 1:]))
+
+    def test_grade(self):
+        result = generator.grade(test_solution.TestDiagonalSudoku.diagonal_grid)
+        self.assertEqual(result['difficulty'], 'easy')
+        self.assertEqual(result['nodes'], 1)
+        result = generator.grade(self.expert_grid)
+        self.assertEqual(result['difficulty'], 'expert')
+        self.assertGreater(result['nodes'], 1)
+        self.assertIsNone(result['strategies'])
+
+    def test_generate_difficulty(self):
+        grid, result = generator.generate('easy', random.Random(2))
+        self.assertEqual(result['difficulty'], 'easy')
+        self.assertEqual(result['nodes'], 1)
+        self.assertTrue(solution.has_unique_solution(grid))
+
+    def test_generate_many_reproducible(self):
+        first = list(generator.generate_many(2, workers=1, difficulty='easy', seed=7))
+        second = list(generator.generate_many(2, workers=1, difficulty='easy', seed=7))
+        self.assertEqual(first, second)
+
+    def test_rate(self):
+        # every puzzle is generated; a reachable rate is not exceeded
+        start = time.perf_counter()
+        puzzles = list(generator.generate_many(2, difficulty='easy', seed=7, rate=2))
+        self.assertEqual(len(puzzles), 2)
+        self.assertGreaterEqual(time.perf_counter() - start, 2 / 2)
+        # an unreachable one is reported
+        with self.assertWarns(RuntimeWarning):
+            puzzles = list(generator.generate_many(5, difficulty='easy', seed=7, rate=1e6))
+        self.assertEqual(len(puzzles), 5)
+
+    def test_deadline(self):
+        puzzles = list(generator.generate_many(1000, workers=1, difficulty='easy', seed=7, deadline=0.2))
+        self.assertGreaterEqual(len(puzzles), 1)
+        self.assertLess(len(puzzles), 1000)
+        puzzles = list(generator.generate_many(1000, workers=2, difficulty='easy', seed=7, deadline=0.2))
+        self.assertLess(len(puzzles), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import random
+import time
+import unittest
+
+import bitboard
+from geometry import standard_geometry, jigsaw_geometry
+
+
+def latin_square(n):
+    """A valid N²×N² Sudoku solution built from shifted rows """
+    geometry = standard_geometry(n)
+    size = len(geometry)
+    return ''.join(geometry.digits[(n * (r % n) + r // n + c) % size]
+                   for r in range(size) for c in range(size))
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_standard_tables(self):
+        geometry = standard_geometry(4)
+        self.assertEqual(len(geometry.boxes), 256)
+        self.assertEqual(len(geometry.unitlist), 48)
+        self.assertTrue(all(len(geometry.peers[box]) == 39 for box in geometry.boxes))
+        self.assertEqual(len(standard_geometry(3, diagonal=True).unitlist), 29)
+
+    def test_cached(self):
+        self.assertIs(standard_geometry(4), standard_geometry(4))
+        self.assertIs(bitboard.engine(standard_geometry(4)), bitboard.engine(standard_geometry(4)))
+
+    def test_jigsaw_validation(self):
+        with self.assertRaises(ValueError):
+            jigsaw_geometry('AAAB')
+        with self.assertRaises(ValueError):
+            jigsaw_geometry('AAAAAAAAAAAABBBB')
+
+    def test_solve_16x16(self):
+        geometry = standard_geometry(4)
+        solved = latin_square(4)
+        grid = ''.join(c if i % 3 else '.' for i, c in enumerate(solved))
+        values = bitboard.solve(grid, geometry)
+        self.assertTrue(values)
+        result = geometry.values2grid(values)
+        for unit in geometry.unitlist:
+            self.assertEqual(sorted(values[box] for box in unit), sorted(geometry.digits))
+        self.assertTrue(all(g in ('.', r) for g, r in zip(grid, result)))
+
+    def check_solution(self, geometry, grid, values):
+        self.assertTrue(values)
+        for unit in geometry.unitlist:
+            self.assertEqual(len({values[box] for box in unit}), len(unit))
+        result = geometry.values2grid(values)
+        self.assertTrue(all(g in ('.', r) for g, r in zip(grid, result)))
+
+    def test_short_extra_unit(self):
+        # A1, B5 and C9 share no row, column or block, and hold different
+        # digits in the latin square
+        geometry = standard_geometry(3, extra_units=(('A1', 'B5', 'C9'),))
+        grid = ''.join(c if i % 3 else '.' for i, c in enumerate(latin_square(3)))
+        values = bitboard.solve(grid, geometry)
+        self.check_solution(geometry, grid, values)
+        self.assertFalse(bitboard.solve('1' + '.' * 12 + '1' + '.' * 67, geometry))
+
+    def test_solve_25x25(self):
+        geometry = standard_geometry(5)
+        rng = random.Random(1)
+        grid = ''.join(c if rng.random() > 0.6 else '.' for c in latin_square(5))
+        start = time.perf_counter()
+        values = bitboard.solve(grid, geometry)
+        # about 0.25 seconds on a single core; the bound only catches blow-ups
+        self.assertLess(time.perf_counter() - start, 10)
+        self.check_solution(geometry, grid, values)
+
+
+if __name__ == '__main__':
+    unittest.main()
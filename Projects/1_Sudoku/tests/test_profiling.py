@@ -0,0 +1,67 @@
+import json
+import unittest
+from unittest import mock
+
+import profiling
+import solution
+from profiling import Profiler
+from tests import test_solution
+
+
+class TestProfiler(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+
+    def test_off_by_default(self):
+        self.assertIsNone(profiling._profiler)
+        self.assertIsNone(profiling.laps())
+        # without a Profiler nothing is timed and no Laps is created
+        with mock.patch.object(profiling.time, 'perf_counter') as clock, \
+                mock.patch.object(profiling, 'Laps') as timer:
+            solution.reduce_puzzle(solution.grid2values(self.diagonal_grid))
+            solution.solve(self.diagonal_grid, strategies=('hidden_pairs',))
+        clock.assert_not_called()
+        timer.assert_not_called()
+        with Profiler() as profile:
+            pass
+        self.assertEqual(profile.stats, {})
+        self.assertIsNone(profiling._profiler)
+
+    def test_reduce_puzzle(self):
+        values = solution.grid2values(self.diagonal_grid)
+        before = sum(len(v) for v in values.values())
+        with Profiler() as profile:
+            values = solution.reduce_puzzle(values, ('eliminate', 'only_choice', 'pointing'))
+        stats = profile.as_dict()
+        self.assertEqual(set(stats), {'eliminate', 'only_choice', 'pointing'})
+        self.assertEqual(sum(entry['eliminated'] for entry in stats.values()),
+                         before - sum(len(v) for v in values.values()))
+        self.assertEqual(stats['eliminate']['calls'], stats['pointing']['calls'])
+        self.assertEqual(json.loads(profile.to_json()), stats)
+
+    def test_search(self):
+        with Profiler() as profile:
+            solution.solve(self.diagonal_grid, strategies=('hidden_pairs',))
+        self.assertEqual(set(profile.stats), {'eliminate', 'naked_twins', 'only_choice', 'hidden_pairs'})
+        self.assertEqual(sum(profile.stats[name]['solved'] for name in ('eliminate', 'naked_twins', 'only_choice')),
+                         81 - 17)
+        self.assertGreater(profile.stats['only_choice']['calls'], 0)
+        self.assertTrue(all(entry['seconds'] > 0 for entry in profile.stats.values()))
+
+    def test_laps(self):
+        profile = Profiler()
+        timer = profiling.Laps(profile)
+        timer.start('eliminate')
+        timer.count(3, 1)
+        timer.start('only_choice')
+        timer.count(2, 0)
+        timer.start('eliminate')
+        timer.count(1, 0)
+        timer.stop()
+        self.assertEqual(profile.stats['eliminate']['calls'], 1)
+        self.assertEqual(profile.stats['eliminate']['eliminated'], 4)
+        self.assertEqual(profile.stats['eliminate']['solved'], 1)
+        self.assertEqual(profile.stats['only_choice']['eliminated'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+import puzzle_io
+import solution
+from geometry import standard_geometry
+from tests import test_solution
+
+
+class TestPuzzleIO(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+    solved = test_solution.TestDiagonalSudoku.solved_diag_sudoku
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def round_trip(self, name, use_mmap=False):
+        path = os.path.join(self.tmp.name, name)
+        with puzzle_io.open_grids(path, 'w') as f:
+            f.write('# header\n\n')
+            n = puzzle_io.write_grids(f, [self.diagonal_grid, self.solved, False])
+        self.assertEqual(n, 3)
+        return list(puzzle_io.read_grids(path, use_mmap))
+
+    def expected(self):
+        return [self.diagonal_grid, puzzle_io.format_grid(self.solved), '-' * 81]
+
+    def test_plain(self):
+        expected = self.expected()
+        self.assertEqual(self.round_trip('puzzles.txt'), expected)
+        self.assertEqual(self.round_trip('puzzles.txt', use_mmap=True), expected)
+        self.assertEqual([puzzle_io.is_solution(grid) for grid in expected], [True, True, False])
+
+    def test_gzip(self):
+        expected = self.expected()
+        self.assertEqual(self.round_trip('puzzles.txt.gz'), expected)
+        with open(os.path.join(self.tmp.name, 'puzzles.txt.gz'), 'rb') as f:
+            self.assertEqual(f.read(2), b'\x1f\x8b')
+
+    def test_empty_mmap(self):
+        path = os.path.join(self.tmp.name, 'empty.txt')
+        open(path, 'w').close()
+        self.assertEqual(list(puzzle_io.read_grids(path, use_mmap=True)), [])
+
+    def test_format_geometry(self):
+        geometry = standard_geometry(4)
+        values = {box: '1' for box in geometry.boxes}
+        self.assertEqual(puzzle_io.format_grid(values, geometry), '1' * 256)
+        self.assertEqual(puzzle_io.format_grid(False), '-' * 81)
+        self.assertEqual(puzzle_io.format_grid(False, geometry), '-' * 256)
+
+    def test_aligned(self):
+        # the output of a batch with unsolvable puzzles lines up with its input
+        grids = [self.diagonal_grid, '11' + '.' * 79, self.diagonal_grid]
+        path = os.path.join(self.tmp.name, 'solved.txt')
+        with puzzle_io.open_grids(path, 'w') as f:
+            puzzle_io.write_grids(f, (solution.solve(grid) for grid in grids))
+        results = list(puzzle_io.read_grids(path))
+        self.assertEqual(len(results), len(grids))
+        self.assertEqual([puzzle_io.is_solution(grid) for grid in results], [True, False, True])
+        self.assertEqual(results[2], solution.values2grid(self.solved))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import glob
+import os
+import tempfile
+import unittest
+
+import solution
+from tests import test_solution
+from utils import Recorder, reconstruct
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+else:
+    import PySudoku
+
+
+@unittest.skipUnless(pygame, "pygame is not installed")
+class TestPySudoku(unittest.TestCase):
+    # a nearly solved puzzle keeps the replay short
+    grid = '....' + solution.values2grid(test_solution.TestDiagonalSudoku.solved_diag_sudoku)[4:]
+
+    def setUp(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.values = solution.grid2values(self.grid)
+        with Recorder() as self.history:
+            self.result = solution.solve(self.grid)
+
+    def test_export_png(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            n = PySudoku.export(dict(self.values), self.result, self.history,
+                                os.path.join(tmp, '{:04d}.png'))
+            self.assertEqual(n, 4 + 1)
+            self.assertEqual(len(glob.glob(os.path.join(tmp, '*.png'))), n)
+            self.assertEqual(pygame.image.load(os.path.join(tmp, '0000.png')).get_size(),
+                             PySudoku.BOARD_SIZE)
+
+    @unittest.skipUnless(pygame and PySudoku.Image, "Pillow is not installed")
+    def test_export_gif(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'replay.gif')
+            n = PySudoku.export(dict(self.values), self.result, self.history, path)
+            self.assertEqual(n, 4 + 1)
+            with PySudoku.Image.open(path) as image:
+                self.assertEqual(image.size, PySudoku.BOARD_SIZE)
+                self.assertEqual(image.n_frames, n)
+
+    def test_update_redraws_one_square(self):
+        pygame.init()
+        surface = pygame.Surface(PySudoku.BOARD_SIZE)
+        board = PySudoku.Board(self.values, surface)
+        board.draw()
+        before = surface.copy()
+        box, value = reconstruct(self.result, self.history)[0]
+        rect = board.update(box, value)
+        self.assertEqual(rect, board.squares[box].rect())
+        pixels = lambda image: pygame.image.tostring(image, 'RGB')
+        self.assertNotEqual(pixels(surface), pixels(before))
+        # putting the old square back restores the whole board
+        surface.blit(before, rect, rect)
+        self.assertEqual(pixels(surface), pixels(before))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,8 @@ own additional test cases to cover any failed tests shown in the Project Assista
 """
 import unittest
 import solution
+import utils
+from cache import LRUCache
 
 
 class TestNakedTwins(unittest.TestCase):
@@ -99,5 +101,107 @@ class TestDiagonalSudoku(unittest.TestCase):
     def test_solve(self):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
+
+class TestPropagate(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = TestDiagonalSudoku.solved_diag_sudoku
+
+    def test_propagate_keeps_solution(self):
+        values = solution.propagate(solution.grid2values(self.diagonal_grid))
+        for box, digit in self.solved_diag_sudoku.items():
+            self.assertIn(digit, values[box])
+
+    def test_propagate_matches_reduce_puzzle(self):
+        reduced = solution.reduce_puzzle(solution.grid2values(self.diagonal_grid))
+        propagated = solution.propagate(solution.grid2values(self.diagonal_grid))
+        for box in solution.boxes:
+            self.assertTrue(set(propagated[box]) <= set(reduced[box]))
+
+    def test_propagate_contradiction(self):
+        self.assertFalse(solution.propagate(solution.grid2values('11' + '.' * 79)))
+
+
+class TestSearchInplace(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = TestDiagonalSudoku.solved_diag_sudoku
+
+    def test_solve_inplace(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='inplace'), self.solved_diag_sudoku)
+
+    def test_failure_restores_board(self):
+        # propagation alone does not reveal that this puzzle has no solution
+        grid = '.679..............4.......6576.............17...6....86.2.798..9...8.764....6.9.3'
+        values = solution.grid2values(grid)
+        trail = []
+        self.assertFalse(solution.search_inplace(values, trail=trail))
+        self.assertEqual(values, solution.grid2values(grid))
+        self.assertEqual(trail, [])
+
+
+class TestExactCover(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+    solved_diag_sudoku = TestDiagonalSudoku.solved_diag_sudoku
+
+    def test_solve_dlx(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, backend='dlx'), self.solved_diag_sudoku)
+
+    def test_count_solutions(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+        self.assertEqual(solution.count_solutions('11' + '.' * 79), 0)
+        self.assertEqual(solution.count_solutions('.' * 81, limit=5), 5)
+
+    def test_uniqueness(self):
+        self.assertTrue(solution.has_unique_solution(self.diagonal_grid))
+        self.assertFalse(solution.has_unique_solution('2' + '.' * 80))
+
+    def test_iter_solutions(self):
+        solutions = solution.iter_solutions('.' * 81)
+        first, second = next(solutions), next(solutions)
+        self.assertNotEqual(first, second)
+
+
+class TestRecorder(unittest.TestCase):
+    diagonal_grid = TestDiagonalSudoku.diagonal_grid
+
+    def test_tracing_off_by_default(self):
+        solution.solve(self.diagonal_grid)
+        self.assertIsNone(utils._recorder)
+
+    # search abandons several branches before it solves this puzzle
+    backtracking_grid = '4...23...........4.8.15.....2....9..9......5................3.......97.2..74....9'
+
+    def check_replay(self, grid, result, history):
+        """The replay places every unsolved box once, in an order that never
+        repeats a digit among peers """
+        values = solution.grid2values(grid)
+        path = solution.reconstruct(result, history)
+        self.assertEqual(len(path), sum(len(v) > 1 for v in values.values()))
+        for box, value in path:
+            self.assertEqual(len(values[box]), 9, "{} was assigned twice".format(box))
+            self.assertNotIn(value, [values[peer] for peer in solution.peers[box]])
+            values[box] = value
+        self.assertEqual(values, result)
+
+    def test_reconstruct(self):
+        for grid in [self.diagonal_grid, self.backtracking_grid]:
+            for backend in ['search', 'inplace']:
+                with solution.Recorder() as history:
+                    result = solution.solve(grid, backend)
+                self.check_replay(grid, result, history)
+
+    def test_reconstruct_order(self):
+        with solution.Recorder() as history:
+            result = solution.solve(self.backtracking_grid)
+        self.assertEqual(solution.reconstruct(result, history), history.steps)
+        with self.assertRaises(ValueError):
+            solution.reconstruct(solution.solve(self.diagonal_grid), history)
+
+    def test_reconstruct_from_cache(self):
+        cache = LRUCache()
+        solution.solve(self.backtracking_grid, cache=cache)
+        with solution.Recorder() as history:
+            result = solution.solve(self.backtracking_grid, cache=cache)
+        self.check_replay(self.backtracking_grid, result, history)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+import os
+import unittest
+
+import solution
+from strategies import hidden_pairs, naked_triples, pointing, claiming
+from tests import test_solution
+
+
+def empty_board():
+    return {box: '123456789' for box in solution.boxes}
+
+
+def remove(values, digit, boxes):
+    for box in boxes:
+        values[box] = values[box].replace(digit, '')
+    return values
+
+
+class TestStrategies(unittest.TestCase):
+    row_a = solution.row_units[0]
+    block_1 = solution.square_units[0]
+
+    def test_hidden_pairs(self):
+        values = empty_board()
+        for digit in '12':
+            remove(values, digit, self.row_a[2:])
+        values = hidden_pairs(values, solution.occupancy(values))
+        self.assertEqual((values['A1'], values['A2']), ('12', '12'))
+        self.assertEqual(values['A3'], '3456789')
+
+    def test_naked_triples(self):
+        values = empty_board()
+        values.update(A1='12', A2='23', A3='13')
+        values = naked_triples(values, solution.occupancy(values))
+        self.assertEqual(values['A9'], '456789')
+        self.assertEqual(values['C3'], '456789')
+        self.assertEqual(values['I1'], '123456789')
+
+    def test_pointing(self):
+        values = remove(empty_board(), '5', [box for box in self.block_1 if box not in ('A1', 'A2')])
+        values = pointing(values, solution.occupancy(values))
+        self.assertNotIn('5', values['A9'])
+        self.assertIn('5', values['A1'])
+        self.assertIn('5', values['I1'])
+
+    def test_claiming(self):
+        values = remove(empty_board(), '7', self.row_a[2:])
+        values = claiming(values, solution.occupancy(values))
+        self.assertNotIn('7', values['B2'])
+        self.assertIn('7', values['A2'])
+        self.assertIn('7', values['B4'])
+
+    def test_occupancy_sync(self):
+        values = empty_board()
+        index = solution.occupancy(values)
+        values['A1'] = '9'
+        index.sync(values)
+        self.assertEqual(index.places[0]['1'], set(self.row_a[1:]))
+        self.assertEqual(index.places[0]['9'], set(self.row_a))
+
+    def assertIndexed(self, index, values):
+        fresh = solution.occupancy(values)
+        self.assertEqual(index.candidates, fresh.candidates)
+        for places, expected in zip(index.places, fresh.places):
+            self.assertEqual({d: b for d, b in places.items() if b}, {d: b for d, b in expected.items() if b})
+
+    def test_index_follows_search(self):
+        strategies = ('naked_pairs', 'hidden_pairs', 'pointing', 'claiming')
+        # no solution, so every branch is undone
+        grid = '.679..............4.......6576.............17...6....86.2.798..9...8.764....6.9.3'
+        values = solution.grid2values(grid)
+        index = solution.occupancy(values)
+        self.assertFalse(solution.search_inplace(values, strategies=strategies, index=index))
+        self.assertEqual(values, solution.grid2values(grid))
+        self.assertIndexed(index, values)
+        grid = test_solution.TestRecorder.backtracking_grid
+        for search in [solution.search, solution.search_inplace]:
+            values = solution.grid2values(grid)
+            index = solution.occupancy(values)
+            result = search(values, strategies=strategies, index=index)
+            self.assertIndexed(index, result)
+
+    def test_same_solutions(self):
+        with open(os.path.join(os.path.dirname(solution.__file__), 'benchmarks', 'diagonal.txt')) as f:
+            grids = [line.strip() for line in f if not line.startswith('#')][:10]
+        strategies = tuple(name for name in solution.STRATEGIES if name not in solution.DEFAULT_STRATEGIES)
+        for grid in grids:
+            expected = solution.solve(grid)
+            self.assertEqual(solution.solve(grid, 'search', strategies), expected)
+            self.assertEqual(solution.solve(grid, 'inplace', strategies), expected)
+
+    def test_reduce_and_search(self):
+        grid = test_solution.TestDiagonalSudoku.diagonal_grid
+        strategies = tuple(solution.STRATEGIES)
+        values = solution.reduce_puzzle(solution.grid2values(grid), strategies)
+        default = solution.reduce_puzzle(solution.grid2values(grid))
+        self.assertTrue(all(set(values[box]) <= set(default[box]) for box in solution.boxes))
+        self.assertEqual(solution.solve(grid, 'search', strategies),
+                         test_solution.TestDiagonalSudoku.solved_diag_sudoku)
+        self.assertEqual(solution.solve(grid, 'inplace', ('hidden_pairs', 'pointing')),
+                         test_solution.TestDiagonalSudoku.solved_diag_sudoku)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import random
+import unittest
+
+import solution
+import symmetry
+from cache import LRUCache
+from tests import test_solution
+
+
+class TestSymmetry(unittest.TestCase):
+    diagonal_grid = test_solution.TestDiagonalSudoku.diagonal_grid
+
+    def equivalent(self, grid, seed):
+        rng = random.Random(seed)
+        cells = rng.choice(symmetry.TRANSFORMS)
+        digits = dict(zip('123456789', rng.sample('123456789', 9)))
+        return ''.join(digits.get(grid[i], '.') for i in cells)
+
+    def test_transforms_keep_units(self):
+        index = {box: i for i, box in enumerate(solution.boxes)}
+        units = {frozenset(index[box] for box in unit) for unit in solution.unitlist}
+        for cells in symmetry.TRANSFORMS:
+            moved = {src: i for i, src in enumerate(cells)}
+            self.assertTrue(all(frozenset(moved[i] for i in unit) in units for unit in units))
+
+    def test_canonical_form(self):
+        canonical, transform = symmetry.canonical_form(self.diagonal_grid)
+        self.assertEqual(symmetry.transform_grid(self.diagonal_grid, transform), canonical)
+        self.assertEqual(symmetry.restore_grid(canonical, transform), self.diagonal_grid)
+        for seed in range(5):
+            self.assertEqual(symmetry.canonical_form(self.equivalent(self.diagonal_grid, seed))[0], canonical)
+
+    def test_solve_shares_cache(self):
+        cache = LRUCache()
+        self.assertEqual(symmetry.solve(self.diagonal_grid, cache),
+                         test_solution.TestDiagonalSudoku.solved_diag_sudoku)
+        grid = self.equivalent(self.diagonal_grid, 1)
+        values = symmetry.solve(grid, cache)
+        self.assertEqual(cache.cache_info().hits, 1)
+        self.assertTrue(all(val in ('.', values[box]) for val, box in zip(grid, solution.boxes)))
+        for unit in solution.unitlist:
+            self.assertEqual(sorted(values[box] for box in unit), list(solution.digits))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ from collections import defaultdict
 rows = 'ABCDEFGHI'
 cols = '123456789'
 boxes = [r + c for r in rows for c in cols]
-history = {}  # history must be declared here so that it exists in the assign_values scope
+_recorder = None  # the active Recorder, if any; tracing is off by default
 
 
 def extract_units(unitlist, boxes):
@@ -66,29 +66,110 @@ def extract_peers(units, boxes):
     return peers
 
 
+class Recorder:
+    """Opt-in trace of the assignments made while solving a puzzle
+
+    Nothing is recorded or printed unless a Recorder is active. Use it as a
+    context manager around the solver, then pass it to `reconstruct` or
+    `PySudoku.play` as the history:
+
+        with Recorder() as history:
+            result = solve(grid)
+        PySudoku.play(grid2values(grid), result, history)
+
+    Attributes
+    ----------
+    steps : list
+        (box, digit) deltas in the order the solver made them; when search
+        abandons a branch it rewinds the steps made on that branch, so only
+        the path to the solution is kept
+
+    verbose : bool
+        If True, `trace_round` displays the board after every propagation round
+    """
+    def __init__(self, verbose=False):
+        self.steps = []
+        self.verbose = verbose
+        self._previous = None
+
+    def __enter__(self):
+        global _recorder
+        self._previous, _recorder = _recorder, self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _recorder
+        _recorder, self._previous = self._previous, None
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def record_round(self, before, values):
+        """Record the boxes solved by a round of propagation
+
+        The strategies update the board directly, so instead of checking for
+        a Recorder on every assignment the solver copies the board before a
+        round (only while tracing) and records the difference afterwards.
+
+        Parameters
+        ----------
+        before(dict)
+            the board at the start of the round
+
+        values(dict)
+            the board at the end of the round
+        """
+        self.steps.extend((box, value) for box, value in values.items()
+                          if len(value) == 1 and before[box] != value)
+
+    def rewind(self, mark):
+        """Forget the steps recorded after the first `mark` ones (an abandoned branch) """
+        del self.steps[mark:]
+
+
+def tracing():
+    """Return the active Recorder, or None if tracing is off """
+    return _recorder
+
+
+def trace_round(values):
+    """Display the board after a propagation round if verbose tracing is active """
+    if _recorder is not None and _recorder.verbose:
+        display(values)
+
+
 def assign_value(values, box, value):
     """You must use this function to update your values dictionary if you want to
-    try using the provided visualization tool. This function records each assignment
-    (in order) for later reconstruction.
+    try using the provided visualization tool. While a `Recorder` is active, this
+    function records each assignment of a single digit (in order) for later
+    reconstruction; otherwise it only updates the dictionary.
 
     Parameters
     ----------
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    box(string)
+        the name of the box to update, e.g. 'A1'
+
+    value(string)
+        the new candidate digits for the box
+
     Returns
     -------
     dict
-        The values dictionary with the naked twins eliminated from peers
+        The values dictionary with the box updated
     """
     # Don't waste memory appending actions that don't actually change any values
     if values[box] == value:
         return values
 
-    prev = values2grid(values)
     values[box] = value
-    if len(value) == 1:
-        history[values2grid(values)] = (prev, (box, value))
+    if _recorder is not None and len(value) == 1:
+        _recorder.steps.append((box, value))
     return values
 
 
@@ -167,12 +248,12 @@ def reconstruct(values, history):
     Parameters
     ----------
     values(dict)
-        a dictionary of the form {'box_name': '123456789', ...}
+        a dictionary of the form {'box_name': '123456789', ...} holding the
+        final (solved) board
 
-    history(dict)
-        a dictionary of the form {key: (key, (box, value))} encoding a linked
-        list where each element points to the parent and identifies the value
-        assignment that connects from the parent to the current state
+    history(Recorder or iterable)
+        the (box, digit) deltas recorded while solving the puzzle (and no
+        other puzzle)
 
     Returns
     -------
@@ -180,9 +261,10 @@ def reconstruct(values, history):
         a list of (box, value) assignments that can be applied in order to the
         starting Sudoku puzzle to reach the solution
     """
-    path = []
-    prev = values2grid(values)
-    while prev in history:
-        prev, step = history[prev]
-        path.append(step)
-    return path[::-1]
+    # search rewinds the Recorder when it abandons a branch, so the history
+    # is already the path to the solution, in the order it was taken
+    path = list(history)
+    for box, value in path:
+        if values[box] != value:
+            raise ValueError("The history assigns {} to {}, which is not in the final board".format(value, box))
+    return path
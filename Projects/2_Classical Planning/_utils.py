@@ -3,7 +3,7 @@ from itertools import product
 from timeit import default_timer as timer
 
 from aimacode.logic import associate
-from aimacode.search import InstrumentedProblem
+from aimacode.search import InstrumentedProblem, Node
 from aimacode.utils import expr
 
 
@@ -30,6 +30,27 @@ def run_search(problem, search_function, parameter=None):
     print()
 
 
+def search_record(problem, search_function, parameter=None):
+    """ Run a search like run_search, but return the statistics as a dict
+    instead of printing them
+
+    Returns
+    -------
+    dict with the keys 'actions', 'expansions', 'goal_tests', 'new_nodes',
+    'plan_length' (None if no plan was found) and 'seconds'
+    """
+    ip = PrintableProblem(problem)
+    start = timer()
+    if parameter is not None:
+        node = search_function(ip, parameter)
+    else:
+        node = search_function(ip)
+    end = timer()
+    return {'actions': len(problem.actions_list), 'expansions': ip.succs, 'goal_tests': ip.goal_tests,
+            'new_nodes': ip.states, 'plan_length': len(node.solution()) if isinstance(node, Node) else None,
+            'seconds': end - start}
+
+
 def show_solution(node, elapsed_time):
     print("Plan length: {}  Time elapsed in seconds: {}".format(len(node.solution()), elapsed_time))
     for action in node.solution():
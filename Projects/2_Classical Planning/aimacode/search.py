@@ -8,6 +8,8 @@ from .utils import (
     is_in, memoize, print_table, Stack, FIFOQueue, PriorityQueue, name
 )
 
+import heapq
+import itertools
 import sys
 
 infinity = float('inf')
@@ -225,7 +227,7 @@ def best_first_graph_search(problem, f):
             elif child in frontier:
                 incumbent = frontier[child]
                 if f(child) < f(incumbent):
-                    # del frontier[incumbent]
+                    del frontier[incumbent]
                     frontier.append(child)
     return None
 
@@ -282,6 +284,166 @@ def astar_search(problem, h=None):
     return best_first_graph_search(problem, lambda n: n.path_cost + h(n))
 
 
+def compact_astar_search(problem, h=None):
+    """A* search that keeps no Node for the states it generates.
+    Each reached state maps to a (g, h, parent state, action) tuple and the
+    frontier is a heap of (f, state) pairs; a cheaper path to a queued state
+    is pushed again and the stale entry is skipped when it is popped. Nodes
+    are only built along the returned path (the heuristic is called on a
+    temporary Node, because heuristics take nodes). Expands the same states
+    in the same order as astar_search; pair it with compact (hashable,
+    ordered) states such as BitsetPlanningProblem's."""
+    h = h or problem.h
+    start = problem.initial
+    if problem.goal_test(start):
+        return Node(start)
+    reached = {start: (0, h(Node(start)), None, None)}
+    frontier = [(reached[start][1], start)]
+    explored = set()
+    while frontier:
+        _, state = heapq.heappop(frontier)
+        if state in explored:
+            continue
+        if problem.goal_test(state):
+            return _path_node(reached, state)
+        explored.add(state)
+        cost = reached[state][0]
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            if child in explored:
+                continue
+            child_cost = problem.path_cost(cost, state, action, child)
+            incumbent = reached.get(child)
+            if incumbent is None:
+                child_h = h(Node(child, None, action, child_cost))
+            elif child_cost < incumbent[0]:
+                child_h = incumbent[1]
+            else:
+                continue
+            reached[child] = (child_cost, child_h, state, action)
+            heapq.heappush(frontier, (child_cost + child_h, child))
+    return None
+
+
+def _path_node(reached, state):
+    """Build the Nodes along the path to state from the parent pointers of
+    compact_astar_search and return the last one."""
+    steps = []
+    while reached[state][2] is not None:
+        steps.append((state, reached[state][3]))
+        state = reached[state][2]
+    node = Node(state)
+    for state, action in reversed(steps):
+        node = Node(state, node, action, reached[state][0])
+    return node
+
+
+def lazy_greedy_best_first_search(problem, h=None, preferred=None, boost=1000):
+    """Greedy best-first search with deferred evaluation.
+    The frontier holds (parent, action) pairs ranked by the parent's h; a
+    child is only generated and evaluated when it is popped, so h is called
+    once per expanded state instead of once per generated node, which pays
+    off with expensive heuristics. If preferred(node) returns the preferred
+    operators of a node (e.g., the helpful actions of FF), their successors
+    also go to a second queue and the two queues are popped in turn; the
+    preferred queue gets `boost` extra turns whenever h improves on the best
+    value seen so far. States with an infinite h are dead ends and are not
+    expanded."""
+    h = h or problem.h
+    node = Node(problem.initial)
+    if problem.goal_test(node.state):
+        return node
+    queues = [[(0, 0, node, None)]]
+    if preferred is not None:
+        queues.append([])
+    turns = [0] * len(queues)
+    counter = itertools.count(1)
+    closed = set()
+    best = infinity
+    while any(queues):
+        k = min((turns[i], i) for i, queue in enumerate(queues) if queue)[1]
+        turns[k] += 1
+        _, _, parent, action = heapq.heappop(queues[k])
+        node = parent if action is None else parent.child_node(problem, action)
+        if node.state in closed:
+            continue
+        closed.add(node.state)
+        if action is not None and problem.goal_test(node.state):
+            return node
+        value = h(node)
+        if value == infinity:
+            continue
+        if value < best:
+            best = value
+            if preferred is not None:
+                turns[1] -= boost
+        actions = problem.actions(node.state)
+        for action in actions:
+            heapq.heappush(queues[0], (value, next(counter), node, action))
+        if preferred is not None:
+            # keep the order of actions (a set of actions would order them by
+            # id(), making the tie breaking differ from run to run)
+            useful = set(preferred(node))
+            for action in actions:
+                if action in useful:
+                    heapq.heappush(queues[1], (value, next(counter), node, action))
+    return None
+
+
+def enforced_hill_climbing(problem, h=None, preferred=None):
+    """[Hoffmann & Nebel, 2001] Enforced hill-climbing, the search of FF.
+    From the current node, a breadth-first search looks for a state with a
+    strictly lower h (or a goal), and the search commits to the first one it
+    finds. If preferred(node) is given, the breadth-first searches only
+    follow the preferred operators of each node (e.g., FF's helpful
+    actions), falling back to every action when that fails. Returns None
+    if no better state can be reached: the search is incomplete when a
+    problem has dead ends, but on the problems where it works it is usually
+    much faster than a global search."""
+    h = h or problem.h
+    node = Node(problem.initial)
+    value = h(node)
+    while not problem.goal_test(node.state):
+        if value == infinity:
+            return None
+        improved = None
+        for restrict in ([True, False] if preferred is not None else [False]):
+            improved = _improve(problem, h, node, value, preferred if restrict else None)
+            if improved is not None:
+                break
+        if improved is None:
+            return None
+        node, value = improved
+    return node
+
+
+def _improve(problem, h, node, value, preferred):
+    """Breadth-first search from node for a goal or a node with h below
+    value for enforced_hill_climbing; returns the (node, h) pair found."""
+    frontier = FIFOQueue()
+    frontier.append(node)
+    explored = {node.state}
+    while frontier:
+        parent = frontier.pop()
+        actions = problem.actions(parent.state)
+        if preferred is not None:
+            useful = set(preferred(parent))
+            actions = [action for action in actions if action in useful]
+        for action in actions:
+            child = parent.child_node(problem, action)
+            if child.state in explored:
+                continue
+            explored.add(child.state)
+            if problem.goal_test(child.state):
+                return child, 0
+            child_value = h(child)
+            if child_value < value:
+                return child, child_value
+            if child_value != infinity:
+                frontier.append(child)
+    return None
+
+
 # ______________________________________________________________________________
 # Other search algorithms
 
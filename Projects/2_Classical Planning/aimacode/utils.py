@@ -430,36 +430,74 @@ class FIFOQueue(Queue):
 
 class PriorityQueue(Queue):
     """A queue in which the minimum element (as determined by f and
-    order) is returned first.  Also supports dict-like lookup.
+    order) is returned first.  Also supports dict-like lookup and
+    deletion, so a queued item can be replaced by a better one
+    (decrease-key): `del pq[incumbent]; pq.append(item)`. Appending an
+    item equal to a queued one keeps whichever of the two has the lower
+    f-value (the queued one on a tie), so a key is never increased.
 
     MODIFIED FROM AIMA VERSION
         - Use heapq
-        - Use an additional dict to track membership
+        - Use an additional dict to track membership, which maps each
+          item to its heap entry; pq[key] returns the queued item equal
+          to key (the incumbent), not key itself
+        - Deleted items are marked stale in the heap and skipped when
+          popped (lazy deletion); the heap is rebuilt once stale entries
+          outnumber the queued items
+        - Count pushes, deletions, stale entries skipped and the largest
+          size of the queue (see stats)
     """
 
     def __init__(self, order=None, f=lambda x: x):
         self.A = []
-        self._A = Counter()
+        self._A = {}
         self.f = f
+        self.pushes = self.deletions = self.skipped = self.max_size = 0
 
     def append(self, item):
-        heapq.heappush(self.A, (self.f(item), item))
-        self._A[item] += 1
+        value = self.f(item)
+        incumbent = self._A.get(item)
+        if incumbent is not None:
+            if incumbent[0] <= value:
+                return
+            del self[item]
+        entry = [value, item, True]
+        heapq.heappush(self.A, entry)
+        self._A[item] = entry
+        self.pushes += 1
+        self.max_size = max(self.max_size, len(self._A))
 
     def __len__(self):
-        return len(self.A)
+        return len(self._A)
 
     def pop(self):
-        _, item = heapq.heappop(self.A)
-        self._A[item] -= 1
-        return item
+        while True:
+            _, item, live = heapq.heappop(self.A)
+            if live:
+                del self._A[item]
+                return item
+            self.skipped += 1
 
     def __contains__(self, item):
-        return self._A[item] > 0
+        return item in self._A
 
     def __getitem__(self, key):
-        if self._A[key] > 0:
-            return key
+        entry = self._A.get(key)
+        if entry is not None:
+            return entry[1]
+
+    def __delitem__(self, key):
+        entry = self._A.pop(key)
+        entry[2] = False
+        self.deletions += 1
+        if len(self.A) > 2 * len(self._A) + 16:
+            self.A = [entry for entry in self.A if entry[2]]
+            heapq.heapify(self.A)
+
+    def stats(self):
+        """Return the size and duplicate statistics of the queue."""
+        return {'size': len(self._A), 'heap_size': len(self.A), 'max_size': self.max_size,
+                'pushes': self.pushes, 'deletions': self.deletions, 'skipped': self.skipped}
 
 
 # ______________________________________________________________________________
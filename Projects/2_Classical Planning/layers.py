@@ -1,7 +1,7 @@
 from copy import deepcopy
 from functools import lru_cache
-from itertools import combinations
-from collections import defaultdict, MutableSet
+from collections import defaultdict
+from collections.abc import MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -82,6 +82,111 @@ class ActionNode(object):
                 and self.expr == other.expr)
 
 
+def _bit_ids(bits):
+    """ Yield the positions of the set bits of an integer, lowest first """
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class LayerIndex(object):
+    """ Integer ids for the literals and actions of a planning graph
+
+    Layers sharing an index store their mutex relations as integer bitsets of
+    item ids. The static relations between actions (inconsistent effects and
+    interference) only depend on the two actions, so they are computed once,
+    when an action is first given an id, from per-literal tables of the
+    actions that produce and consume each literal; a single index is shared
+    by every planning graph of a problem (see PlanningGraph).
+
+    Attributes
+    ----------
+    ids : dict
+        Mapping from each literal or action to its id
+
+    items : list
+        items[i] is the literal or action with id i
+
+    negation : list
+        negation[i] is the id of the negation of literal i (None for actions)
+
+    preconditions, effects : list
+        Bitsets of the literal ids of the preconditions & effects of action i
+
+    static : list
+        static[i] is the bitset of the actions that are mutex with action i
+        by inconsistent effects or interference
+
+    producers, consumers : list
+        Bitsets of the actions with literal i as an effect / a precondition
+
+    real_actions : int
+        Bitset of the actions that are not no-ops
+    """
+    def __init__(self):
+        self.ids = {}
+        self.items = []
+        self.negation = []
+        self.preconditions = []
+        self.effects = []
+        self.static = []
+        self.producers = []
+        self.consumers = []
+        self.real_actions = 0
+
+    def id(self, item):
+        """ Return the id of a literal or action, assigning one if it has none """
+        i = self.ids.get(item)
+        if i is None:
+            i = self._add_action(item) if isinstance(item, ActionNode) else self._add_literal(item)
+        return i
+
+    def bits(self, items):
+        """ Return the bitset of the ids of a collection of items """
+        bits = 0
+        for item in items:
+            bits |= 1 << self.id(item)
+        return bits
+
+    def _new(self, item):
+        i = len(self.items)
+        self.ids[item] = i
+        self.items.append(item)
+        for table in (self.preconditions, self.effects, self.static, self.producers, self.consumers):
+            table.append(0)
+        self.negation.append(None)
+        return i
+
+    def _add_literal(self, literal):
+        i = self._new(literal)
+        j = self.ids.get(~literal)
+        if j is None:
+            j = self._new(~literal)
+        self.negation[i], self.negation[j] = j, i
+        return i
+
+    def _add_action(self, action):
+        i = self._new(action)
+        pre, eff = self.bits(action.preconditions), self.bits(action.effects)
+        static = 0
+        for l in _bit_ids(eff):
+            static |= self.producers[self.negation[l]] | self.consumers[self.negation[l]]
+        for l in _bit_ids(pre):
+            static |= self.producers[self.negation[l]]
+        for j in _bit_ids(static):
+            self.static[j] |= 1 << i
+        self.static[i] = static
+        self.preconditions[i], self.effects[i] = pre, eff
+        for l in _bit_ids(eff):
+            self.producers[l] |= 1 << i
+        for l in _bit_ids(pre):
+            self.consumers[l] |= 1 << i
+        if not action.no_op:
+            self.real_actions |= 1 << i
+        return i
+
+
 class BaseLayer(MutableSet):
     """ Base class for ActionLayer and LiteralLayer classes for planning graphs
     that stores actions or literals as a mutable set (which enables terse,
@@ -101,6 +206,11 @@ class BaseLayer(MutableSet):
         children[actionA] is a set containing the symbolic literals (positive AND
         negative) that are set by performing actionA.
 
+        A layer created from another layer starts with the same parents and
+        children sets as that layer (structural sharing); add_inbound_edges and
+        add_outbound_edges copy a set the first time they change it, so the
+        cost of a new layer is proportional to the edges that are new in it.
+
     parent_layer : BaseLayer (or subclass)
         Contains a reference to the layer preceding this one in the planning graph;
         the root literal layer of a planning graph contains an empty ActionLayer as
@@ -109,9 +219,19 @@ class BaseLayer(MutableSet):
         as parent, and literal layers always have an action layer as parent.
     
     _mutexes : dict
-        Mapping from each item (action or literal) to a set containing all items
-        that are mutex to the key. E.g., _mutexes[literaA] is a set of literals
-        that are mutex to literalA in this level of the planning graph
+        Mapping from each item (action or literal) to a bitset of the ids (see
+        index) of all items that are mutex to the key. E.g., _mutexes[literalA]
+        has bit index.id(literalB) set if literalB is mutex to literalA in this
+        level of the planning graph; items with no mutex have no entry
+
+    index : LayerIndex
+        The item ids, shared with the parent layer (or with the layer copied
+        from items) so that mutex bitsets of related layers can be combined
+
+    _mutex_count : int
+        The number of bits set in _mutexes (twice the number of mutex pairs);
+        together with the number of items it lets layers that differ be told
+        apart in constant time (see __eq__)
 
     _ignore_mutexes : bool
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
@@ -119,7 +239,7 @@ class BaseLayer(MutableSet):
         with ~X, but "competing needs" or "inconsistent support" can be skipped
     """
 
-    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False):
+    def __init__(self, items=[], parent_layer=None, ignore_mutexes=False, index=None):
         """
         Parameters
         ----------
@@ -131,12 +251,26 @@ class BaseLayer(MutableSet):
 
         ignore_mutexes : bool
             See _ignore_mutexes attribute
+
+        index : LayerIndex
+            See index attribute; by default the index of parent_layer, or of
+            items if it is a layer, or a new index
         """
         super().__init__()
+        if index is None:
+            if isinstance(parent_layer, BaseLayer):
+                index = parent_layer.index
+            elif isinstance(items, BaseLayer):
+                index = items.index
+            else:
+                index = LayerIndex()
+        self.index = index
         self.__store = set(iter(items))
         self.parents = defaultdict(set)
         self.children = defaultdict(set)
-        self._mutexes = defaultdict(set)
+        self._owned = (set(), set())  # keys of the parents / children sets that this layer may modify
+        self._mutexes = {}
+        self._mutex_count = 0
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
 
@@ -150,9 +284,31 @@ class BaseLayer(MutableSet):
         return len(self.__store)
 
     def __eq__(self, other):
+        # the sizes are compared first, so layers that differ (all but the last
+        # two layers of a planning graph) are compared in constant time
         return (len(self) == len(other) and
+                self._mutex_count == other._mutex_count and
                 len(self._mutexes) == len(other._mutexes) and
-                0 == len(self ^ other) and self._mutexes == other._mutexes)
+                self.__store == set(other) and self._mutexes == other._mutexes)
+
+    def _share_edges(self, layer):
+        """ Start with the parents and children sets of another layer """
+        self.parents.update(layer.parents)
+        self.children.update(layer.children)
+
+    def _edges(self, edges, owned, item):
+        """ Return the set edges[item], copying it first if it is shared with another layer """
+        if item not in owned:
+            edges[item] = set(edges.get(item, ()))
+            owned.add(item)
+        return edges[item]
+
+    def _add_mutexes(self, item, mutexes):
+        old = self._mutexes.get(item, 0)
+        new = old | mutexes
+        if new != old:
+            self._mutexes[item] = new
+            self._mutex_count += bin(new ^ old).count('1')
 
     def add(self, item):
         self.__store.add(item)
@@ -164,66 +320,128 @@ class BaseLayer(MutableSet):
             pass
 
     def set_mutex(self, itemA, itemB):
-        self._mutexes[itemA].add(itemB)
-        self._mutexes[itemB].add(itemA)
+        self._add_mutexes(itemA, 1 << self.index.id(itemB))
+        self._add_mutexes(itemB, 1 << self.index.id(itemA))
 
     def is_mutex(self, itemA, itemB):
-        setB = self._mutexes.get(itemB, [])
-        res = itemA in setB
-        return res
+        idA = self.index.ids.get(itemA)
+        return idA is not None and bool(self._mutexes.get(itemB, 0) >> idA & 1)
 
 
 class BaseActionLayer(BaseLayer):
-    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
-        super().__init__(actions, parent_layer, ignore_mutexes)
+    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False, index=None):
+        super().__init__(actions, parent_layer, ignore_mutexes, index)
         self._serialize = serialize
         if isinstance(actions, BaseActionLayer):
-            self.parents.update({k: set(v) for k, v in actions.parents.items()})
-            self.children.update({k: set(v) for k, v in actions.children.items()})
+            self._share_edges(actions)
 
     def update_mutexes(self):
-        for actionA, actionB in combinations(iter(self), 2):
-            if self._serialize and actionA.no_op == actionB.no_op == False:
-                self.set_mutex(actionA, actionB)
-            elif (self._inconsistent_effects(actionA, actionB)
-                  or self._interference(actionA, actionB)):
-                self.set_mutex(actionA, actionB)
-            elif self._ignore_mutexes:
-                continue
-            elif self._competing_needs(actionA, actionB):
-                self.set_mutex(actionA, actionB)
+        """ Mark every pair of actions in the layer that are mutex
+
+        Equivalent to testing every pair with _inconsistent_effects,
+        _interference and _competing_needs (and serializing the actions that
+        are not no-ops), but computed with the bitsets of the index: the static
+        mutexes come precomputed, and two actions have competing needs when a
+        precondition of one is mutex in the parent layer with a precondition
+        of the other.
+        """
+        index = self.index
+        ids = [index.id(action) for action in self]
+        layer = 0
+        for i in ids:
+            layer |= 1 << i
+        serial = index.real_actions & layer if self._serialize else 0
+        parent_mutexes = {}
+        if not self._ignore_mutexes and self.parent_layer is not None:
+            # parent_mutexes[l]: the actions in the layer with a precondition mutex with literal l
+            for literal, mutexes in self.parent_layer._mutexes.items():
+                consumers = 0
+                for l in _bit_ids(mutexes):
+                    consumers |= index.consumers[l]
+                if consumers & layer:
+                    parent_mutexes[index.id(literal)] = consumers & layer
+        for action, i in zip(self, ids):
+            mutexes = index.static[i] & layer
+            if serial >> i & 1:
+                mutexes |= serial
+            for l in _bit_ids(index.preconditions[i]):
+                mutexes |= parent_mutexes.get(l, 0)
+            mutexes &= ~(1 << i)
+            if mutexes:
+                self._add_mutexes(action, mutexes)
 
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
-        self.parents[action] |= set(literals)
+        self._edges(self.parents, self._owned[0], action).update(literals)
 
     def add_outbound_edges(self, action, literals):
         # outbound action edges are one-to-many
-        self.children[action] |= set(literals)
+        self._edges(self.children, self._owned[1], action).update(literals)
 
 
 class BaseLiteralLayer(BaseLayer):
-    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False):
-        super().__init__(literals, parent_layer, ignore_mutexes)
+    def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False, index=None):
+        super().__init__(literals, parent_layer, ignore_mutexes, index)
         if isinstance(literals, BaseLiteralLayer):
-            self.parents.update({k: set(v) for k, v in literals.parents.items()})
-            self.children.update({k: set(v) for k, v in literals.children.items()})
+            self._share_edges(literals)
 
     def update_mutexes(self):
-        for literalA, literalB in combinations(iter(self), 2):
-            if self._negation(literalA, literalB):
-                self.set_mutex(literalA, literalB)
-            elif self._ignore_mutexes:
-                continue
-            elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
-                self.set_mutex(literalA, literalB)
+        """ Mark every pair of literals in the layer that are mutex
+
+        Equivalent to testing every pair with _negation and
+        _inconsistent_support, but computed with the bitsets of the index: a
+        literal is supported by the actions in the parent layer that achieve it,
+        and two literals have inconsistent support when every action supporting
+        one is blocked, i.e., mutex with every action supporting the other.
+        Every literal has a representative supporter (its no-op if it has one,
+        since no-ops are rarely mutex), and only the literals whose
+        representative is blocked, or that have no supporter, are tested.
+        """
+        index = self.index
+        ids = [index.id(literal) for literal in self]
+        layer = 0
+        for i in ids:
+            layer |= 1 << i
+        dynamic = not self._ignore_mutexes and self.parent_layer is not None and len(self.parent_layer)
+        if dynamic:
+            parent = self.parent_layer
+            actions = index.bits(parent)
+            support = {}  # literal id -> bitset of its supporting actions
+            represents = defaultdict(int)  # action id -> bitset of the literals it represents
+            blocked = []  # blocked[n]: the actions mutex with every supporter of literal n
+            unsupported = 0
+            for literal, i in zip(self, ids):
+                mutual = actions
+                for action in self.parents.get(literal, ()):
+                    mutual &= parent._mutexes.get(action, 0)
+                blocked.append(mutual)
+                support[i] = achievers = index.bits(self.parents.get(literal, ())) & actions
+                if not achievers:
+                    unsupported |= 1 << i
+                    continue
+                preferred = achievers & ~index.real_actions or achievers
+                represents[(preferred & -preferred).bit_length() - 1] |= 1 << i
+            representatives = 0
+            for a in represents:
+                representatives |= 1 << a
+        for n, (literal, i) in enumerate(zip(self, ids)):
+            mutexes = 1 << index.negation[i] & layer
+            if dynamic:
+                candidates = unsupported
+                for a in _bit_ids(blocked[n] & representatives):
+                    candidates |= represents[a]
+                for j in _bit_ids(candidates & ~(1 << i)):
+                    if not support[j] & ~blocked[n]:
+                        mutexes |= 1 << j
+            if mutexes:
+                self._add_mutexes(literal, mutexes)
 
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
         for literal in literals:
-            self.parents[literal].add(action)
+            self._edges(self.parents, self._owned[0], literal).add(action)
 
     def add_outbound_edges(self, action, literals):
         # outbound literal edges are many-to-many
         for literal in literals:
-            self.children[literal].add(action)
+            self._edges(self.children, self._owned[1], literal).add(action)
@@ -3,14 +3,24 @@ from itertools import chain, combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
-from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
+from layers import BaseActionLayer, BaseLiteralLayer, LayerIndex, makeNoOp, make_node
 
 
 class ActionLayer(BaseActionLayer):
+    """ An action layer of the planning graph
+
+    The mutex predicates below are the pairwise definitions of the action
+    mutexes. Building a graph does not call them: update_mutexes computes the
+    same relations with the bitsets of layers.LayerIndex (the static ones
+    once per problem), and the tests use the predicates as the oracle that
+    the bitsets are checked against.
+    """
 
     def _inconsistent_effects(self, actionA, actionB):
         """ Return True if an effect of one action negates an effect of the other
 
+        Test oracle; LayerIndex precomputes this relation for every action pair.
+
         See Also
         --------
         layers.ActionNode
@@ -23,7 +33,10 @@ class ActionLayer(BaseActionLayer):
 
     def _interference(self, actionA, actionB):
         """ Return True if the effects of either action negate the preconditions of the other 
-        
+
+        Test oracle; LayerIndex precomputes this relation (with inconsistent
+        effects) as the static mutexes of each action.
+
         See Also
         --------
         layers.ActionNode
@@ -38,7 +51,10 @@ class ActionLayer(BaseActionLayer):
 
     def _competing_needs(self, actionA, actionB):
         """ Return True if any preconditions of the two actions are pairwise mutex in the parent layer
-        
+
+        Test oracle; update_mutexes finds these pairs from the mutex bitsets
+        of the parent layer's literals.
+
         See Also
         --------
         layers.ActionNode
@@ -52,10 +68,18 @@ class ActionLayer(BaseActionLayer):
 
 
 class LiteralLayer(BaseLiteralLayer):
+    """ A literal layer of the planning graph
+
+    As in ActionLayer, the mutex predicates are reference definitions used by
+    the tests; update_mutexes computes the literal mutexes with bitsets.
+    """
 
     def _inconsistent_support(self, literalA, literalB):
         """ Return True if all ways to achieve both literals are pairwise mutex in the parent layer
 
+        Test oracle; update_mutexes compares the supporting actions of each
+        literal with bitsets instead of testing every pair of supporters.
+
         See Also
         --------
         layers.BaseLayer.parent_layer
@@ -67,7 +91,8 @@ class LiteralLayer(BaseLiteralLayer):
         return True
 
     def _negation(self, literalA, literalB):
-        """ Return True if two literals are negations of each other """
+        """ Return True if two literals are negations of each other (test oracle;
+        the index stores the id of each literal's negation) """
         return (literalA == ~ literalB) and (literalB == ~ literalA)
 
 
@@ -98,10 +123,16 @@ class PlanningGraph:
         no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
         self._actionNodes = no_ops + [make_node(a) for a in problem.actions_list]
         
+        # the item ids and static mutexes of the layers only depend on the problem,
+        # so they are shared by every planning graph of the problem
+        index = getattr(problem, '_layer_index', None)
+        if index is None:
+            index = problem._layer_index = LayerIndex()
+
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
         literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
-        layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
+        layer = LiteralLayer(literals, ActionLayer(index=index), self._ignore_mutexes)
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
@@ -1,17 +1,96 @@
 
+from collections import Counter
 from functools import lru_cache
+from itertools import chain
 
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
 from _utils import encode_state, decode_state
 from my_planning_graph import PlanningGraph
+from relaxed_graph import RelaxedPlanningGraph, infinity
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
     ##############################################################################
 
 
+class SuccessorGenerator:
+    """ Index of the actions of a planning problem by their preconditions
+
+    Every action that has positive preconditions is watched by one of them
+    (the one that the fewest other actions need), and only the actions watched
+    by a fluent that is True in a state are checked against that state; the
+    few actions without positive preconditions are always checked. An action
+    whose preconditions mention a fluent outside of state_map is never
+    applicable and is left out of the index.
+
+    Attributes
+    ----------
+    actions : list
+        The indexed actions list; applicable actions are reported by their
+        position in it
+
+    watches : list
+        watches[i] lists the (action index, positive precondition indices,
+        negative precondition indices, positive mask, negative mask) of the
+        actions watched by fluent state_map[i], where the positive indices
+        and mask exclude i itself
+
+    unwatched : list
+        The same records for actions without positive preconditions
+    """
+    def __init__(self, actions_list, state_map):
+        self.actions = actions_list
+        self.size = len(state_map)
+        index = {fluent: i for i, fluent in enumerate(state_map)}
+        uses = Counter(index[c] for action in actions_list for c in action.precond_pos if c in index)
+        self.watches = [[] for _ in state_map]
+        self.unwatched = []
+        for k, action in enumerate(actions_list):
+            if any(c not in index for c in chain(action.precond_pos, action.precond_neg)):
+                continue
+            pos = sorted(index[c] for c in action.precond_pos)
+            neg = tuple(sorted(index[c] for c in action.precond_neg))
+            if pos:
+                watch = min(pos, key=lambda i: (uses[i], i))
+                pos.remove(watch)
+                self.watches[watch].append((k, tuple(pos), neg, self.mask(pos), self.mask(neg)))
+            else:
+                self.unwatched.append((k, (), neg, 0, self.mask(neg)))
+
+    def mask(self, indices):
+        """ Return the bit mask of fluent indices, in the layout of BitsetPlanningProblem """
+        bits = 0
+        for i in indices:
+            bits |= 1 << (self.size - 1 - i)
+        return bits
+
+    def applicable(self, state):
+        """ Return the sorted indices of the actions applicable in a tuple(bool) state """
+        found = [k for k, _, neg, _, _ in self.unwatched if not any(state[j] for j in neg)]
+        for i, f in enumerate(state):
+            if f:
+                for k, pos, neg, _, _ in self.watches[i]:
+                    if all(state[j] for j in pos) and not any(state[j] for j in neg):
+                        found.append(k)
+        found.sort()
+        return found
+
+    def applicable_bits(self, bits):
+        """ Return the sorted indices of the actions applicable in an integer state """
+        found = [k for k, _, _, _, neg in self.unwatched if not bits & neg]
+        rest = bits
+        while rest:
+            low = rest & -rest
+            rest ^= low
+            for k, _, _, pos, neg in self.watches[self.size - low.bit_length()]:
+                if bits & pos == pos and not bits & neg:
+                    found.append(k)
+        found.sort()
+        return found
+
+
 class BasePlanningProblem(Problem):
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
@@ -34,13 +113,15 @@ class BasePlanningProblem(Problem):
         carried out from the current state in order to satisfy each individual
         goal condition.
 
+        The planning graph ignores mutexes, so the heuristic is computed on the
+        problem's RelaxedPlanningGraph, which gives the same value as
+        PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+
         See Also
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_levelsum()
-        return score
+        return self.relaxed_graph.h_levelsum(self._graph_literals(node.state))
 
     @lru_cache()
     def h_pg_maxlevel(self, node):
@@ -53,9 +134,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_maxlevel()
-        return score
+        return self.relaxed_graph.h_maxlevel(self._graph_literals(node.state))
 
     @lru_cache()
     def h_pg_setlevel(self, node):
@@ -71,23 +150,85 @@ class BasePlanningProblem(Problem):
         score = pg.h_setlevel()
         return score
 
+    @lru_cache()
+    def h_max(self, node):
+        """ This heuristic estimates the cost of reaching the goal from the
+        current state by the cost of its most expensive goal literal under the
+        delete relaxation (ignoring the delete effects of all actions); it is
+        admissible.
+
+        See Also
+        --------
+        Bonet & Geffner, "Planning as heuristic search" (2001)
+        """
+        return self.relaxed_graph.h_max(self._graph_literals(node.state))
+
+    @lru_cache()
+    def h_add(self, node):
+        """ This heuristic estimates the cost of reaching the goal from the
+        current state by the sum of the costs of the goal literals under the
+        delete relaxation, assuming that goals and preconditions are achieved
+        independently; it is not admissible, but more informative than h_max.
+
+        See Also
+        --------
+        Bonet & Geffner, "Planning as heuristic search" (2001)
+        """
+        return self.relaxed_graph.h_add(self._graph_literals(node.state))
+
+    @lru_cache()
+    def h_ff(self, node):
+        """ This heuristic estimates the cost of reaching the goal from the
+        current state by the number of actions of a plan for the delete
+        relaxation of the problem, extracted from the relaxed planning graph;
+        actions shared by several goals are counted once.
+
+        See Also
+        --------
+        Hoffmann & Nebel, "The FF planning system" (2001)
+        """
+        plan, _ = self._relaxed_plan(node)
+        return infinity if plan is None else len(plan)
+
+    def helpful_actions(self, node):
+        """ Return the actions of the relaxed plan of h_ff that can be executed
+        in the node's state (FF's helpful actions), in actions_list order
+        """
+        _, helpful = self._relaxed_plan(node)
+        return helpful
+
+    @lru_cache()
+    def _relaxed_plan(self, node):
+        graph = self.relaxed_graph
+        literals = self._graph_literals(node.state)
+        plan = graph.relaxed_plan(literals)
+        if plan is None:
+            return None, []
+        return plan, [self.actions_list[a] for a in graph.helpful(plan, literals)]
+
+    def _graph_literals(self, state):
+        return self.relaxed_graph.state_literals(state)
+
+    @property
+    def relaxed_graph(self):
+        """ The RelaxedPlanningGraph of the problem (rebuilt if actions_list is replaced) """
+        graph = self.__dict__.get('_relaxed_graph')
+        if graph is None or graph.actions is not self.actions_list:
+            graph = self._relaxed_graph = RelaxedPlanningGraph(self)
+        return graph
+
+    @property
+    def successors(self):
+        """ The SuccessorGenerator of actions_list (rebuilt if actions_list is replaced) """
+        generator = self.__dict__.get('_successors')
+        if generator is None or generator.actions is not self.actions_list:
+            generator = self._successors = SuccessorGenerator(self.actions_list, self.state_map)
+        return generator
+
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        actions_list = self.actions_list
+        return [actions_list[k] for k in self.successors.applicable(state)]
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
@@ -101,3 +242,128 @@ class BasePlanningProblem(Problem):
     def goal_test(self, state: str) -> bool:
         """ Test the state to see if goal is reached """
         return all(f for f, c in zip(state, self.state_map) if c in self.goal)
+
+
+class BitsetPlanningProblem(Problem):
+    """ A planning problem with every state packed into a single integer
+
+    The bit of fluent problem.state_map[i] is bit n - 1 - i (n fluents), so
+    integer states compare like the tuple(bool) states they encode, and every
+    action is precompiled into bit masks of its positive and negative
+    preconditions and of its add and delete effects, so that `actions`,
+    `result` and `goal_test` are a few bitwise operations instead of a pass
+    over every fluent. The actions, and therefore the plans, are the same as
+    those of the wrapped problem, and they are returned in the same order, so
+    any search expands exactly the same nodes (with the same tie breaking)
+    under either encoding.
+
+    Example
+    -------
+
+    >>> problem = BitsetPlanningProblem(air_cargo_p3())
+    >>> node = astar_search(problem, problem.h_unmet_goals)
+
+    Attributes
+    ----------
+    problem : BasePlanningProblem
+        The wrapped problem; attributes not defined here are looked up on it
+
+    index : dict
+        Mapping from each fluent in state_map to its bit position
+
+    masks : list
+        (precond_pos, precond_neg, effect_add, effect_rem) bit masks of each
+        action in actions_list, or None for actions whose preconditions
+        mention a fluent outside of state_map (they are never applicable)
+
+    goal_mask : int
+        Bit mask of the goal fluents
+
+    successors : SuccessorGenerator
+        Index of the actions by their preconditions
+
+    relaxed_graph : RelaxedPlanningGraph
+        Planning graph used by h_pg_levelsum, h_pg_maxlevel, h_max, h_add and h_ff
+    """
+    def __init__(self, problem):
+        self.problem = problem
+        self.state_map = problem.state_map
+        self.actions_list = problem.actions_list
+        self.index = {fluent: len(self.state_map) - 1 - i for i, fluent in enumerate(self.state_map)}
+        self.masks = [self._compile(action) for action in self.actions_list]
+        self._effects = {action: masks[2:] for action, masks in zip(self.actions_list, self.masks) if masks}
+        self.successors = SuccessorGenerator(self.actions_list, self.state_map)
+        self.relaxed_graph = RelaxedPlanningGraph(self)
+        self.goal_mask = self.mask(problem.goal)
+        super().__init__(self.encode(problem.initial), goal=problem.goal)
+
+    def mask(self, fluents):
+        """ Return the bit mask of the fluents that appear in state_map """
+        bits = 0
+        for fluent in fluents:
+            if fluent in self.index:
+                bits |= 1 << self.index[fluent]
+        return bits
+
+    def _compile(self, action):
+        if any(clause not in self.index for clause in chain(action.precond_pos, action.precond_neg)):
+            return None
+        return (self.mask(action.precond_pos), self.mask(action.precond_neg),
+                self.mask(action.effect_add), self.mask(action.effect_rem))
+
+    def encode(self, state):
+        """ Pack a tuple(bool) state of the wrapped problem into an integer """
+        bits = 0
+        for f in state:
+            bits = bits << 1 | bool(f)
+        return bits
+
+    def decode(self, bits):
+        """ Unpack an integer state into the tuple(bool) state of the wrapped problem """
+        n = len(self.state_map)
+        return tuple([bool(bits >> (n - 1 - i) & 1) for i in range(n)])
+
+    @lru_cache()
+    def h_unmet_goals(self, node):
+        """ See BasePlanningProblem.h_unmet_goals """
+        return bin(self.goal_mask & ~node.state).count('1')
+
+    # the heuristics of BasePlanningProblem, wrapped in caches of this class so
+    # that the two encodings do not share (and evict) each other's entries
+    h_pg_levelsum = lru_cache()(BasePlanningProblem.h_pg_levelsum.__wrapped__)
+    h_pg_maxlevel = lru_cache()(BasePlanningProblem.h_pg_maxlevel.__wrapped__)
+    h_max = lru_cache()(BasePlanningProblem.h_max.__wrapped__)
+    h_add = lru_cache()(BasePlanningProblem.h_add.__wrapped__)
+    h_ff = lru_cache()(BasePlanningProblem.h_ff.__wrapped__)
+    helpful_actions = BasePlanningProblem.helpful_actions
+    _relaxed_plan = lru_cache()(BasePlanningProblem._relaxed_plan.__wrapped__)
+
+    def _graph_literals(self, state):
+        return self.relaxed_graph.state_literals(self.decode(state))
+
+    @lru_cache()
+    def h_pg_setlevel(self, node):
+        """ See BasePlanningProblem.h_pg_setlevel """
+        pg = PlanningGraph(self, self.decode(node.state), serialize=True)
+        return pg.h_setlevel()
+
+    def actions(self, state):
+        """ Return the actions that can be executed in the given state. """
+        actions_list = self.actions_list
+        return [actions_list[k] for k in self.successors.applicable_bits(state)]
+
+    def result(self, state, action):
+        """ Return the state that results from executing the given action in the
+        given state. The action must be one of self.actions(state).
+        """
+        add, rem = self._effects[action]
+        return (state & ~rem) | add
+
+    def goal_test(self, state):
+        """ Test the state to see if goal is reached """
+        return state & self.goal_mask == self.goal_mask
+
+    def __getattr__(self, attr):
+        if attr == 'problem':  # not set yet, e.g., while unpickling
+            raise AttributeError(attr)
+        return getattr(self.problem, attr)
@@ -0,0 +1,237 @@
+
+import heapq
+
+from aimacode.utils import Expr
+
+
+infinity = float('inf')
+
+
+class RelaxedPlanningGraph:
+    """ A planning graph that ignores every mutex, compiled once per problem
+
+    Without mutexes the literal layers of a planning graph only ever grow: a
+    literal enters the graph at the first level where some action achieves it
+    and stays in every later level, so the whole graph is described by the
+    level of each literal. Those levels are computed for a state by counting,
+    for each action, the preconditions that are not in the graph yet; an
+    action enters the graph when its count drops to zero, so the work per
+    state is proportional to the actions that become reachable rather than to
+    the size of the problem, and only two flat lists are allocated per state.
+
+    The levels, and the levelsum and maxlevel heuristics computed from them,
+    are exactly those of my_planning_graph.PlanningGraph built with
+    `serialize=True, ignore_mutexes=True` (serialization only adds mutexes).
+
+    The same tables give the delete-relaxation heuristics of HSP and FF (all
+    actions cost 1): h_max (the level of the last goal to enter the graph),
+    h_add (the sum of the goal costs, where an action costs 1 plus the sum of
+    the costs of its preconditions) and h_FF (the number of actions in a
+    relaxed plan extracted backwards from the goals).
+
+    Attributes
+    ----------
+    fluents : list
+        The fluents of the problem (state_map first, then any other fluent
+        that appears in an action or in the goal); literal 2 * i is the
+        positive literal of fluents[i], and literal 2 * i + 1 its negation
+
+    preconditions : list
+        preconditions[a] is the tuple of precondition literals of action a of
+        actions_list
+
+    effects : list
+        effects[a] is the tuple of effect literals of action a
+
+    consumers : list
+        consumers[l] lists the actions that have literal l as a precondition
+
+    goals : list
+        The distinct goal literals
+    """
+    def __init__(self, problem):
+        self.actions = problem.actions_list
+        self.fluents = list(problem.state_map)
+        self.index = {fluent: i for i, fluent in enumerate(self.fluents)}
+        self.preconditions = [tuple(self._literals(action.precond_pos, action.precond_neg))
+                              for action in self.actions]
+        self.effects = [tuple(self._literals(action.effect_add, action.effect_rem))
+                        for action in self.actions]
+        self.goals = list(dict.fromkeys(self._literal(goal) for goal in problem.goal))
+        self.consumers = [[] for _ in range(2 * len(self.fluents))]
+        self.free = []  # actions without preconditions
+        for a, literals in enumerate(self.preconditions):
+            for literal in literals:
+                self.consumers[literal].append(a)
+            if not literals:
+                self.free.append(a)
+        self.counts = [len(literals) for literals in self.preconditions]
+
+    def _fluent(self, fluent):
+        if fluent not in self.index:
+            self.index[fluent] = len(self.fluents)
+            self.fluents.append(fluent)
+        return self.index[fluent]
+
+    def _literals(self, positive, negative):
+        return [2 * self._fluent(f) for f in positive] + [2 * self._fluent(f) + 1 for f in negative]
+
+    def _literal(self, expr):
+        if isinstance(expr, Expr) and expr.op == '~':
+            return 2 * self._fluent(expr.args[0]) + 1
+        return 2 * self._fluent(expr)
+
+    def state_literals(self, state):
+        """ Return the literals of a tuple(bool) state (see BasePlanningProblem) """
+        return [2 * i + (not f) for i, f in enumerate(state)]
+
+    def levels(self, literals, supporters=None):
+        """ Fill the relaxed planning graph from a set of literals
+
+        Parameters
+        ----------
+        literals : iterable(int)
+            The literals of the root level, e.g., from state_literals()
+
+        supporters : list
+            If given, supporters[l] is set to the action that first achieves
+            each literal l that is not in the root level
+
+        Returns
+        -------
+        (list, int)
+            The level of every literal (-1 for the literals that never enter
+            the graph), and the last level at which a literal entered the
+            graph (the graph is leveled from there on)
+        """
+        level = [-1] * (2 * len(self.fluents))
+        layer = []
+        for literal in literals:
+            if level[literal] < 0:
+                level[literal] = 0
+                layer.append(literal)
+        counts = self.counts[:]
+        consumers, effects = self.consumers, self.effects
+        ready = list(self.free)
+        depth = 0
+        while True:
+            for literal in layer:
+                for a in consumers[literal]:
+                    counts[a] -= 1
+                    if not counts[a]:
+                        ready.append(a)
+            layer = []
+            for a in ready:
+                for literal in effects[a]:
+                    if level[literal] < 0:
+                        level[literal] = depth + 1
+                        layer.append(literal)
+                        if supporters is not None:
+                            supporters[literal] = a
+            if not layer:
+                return level, depth
+            ready = []
+            depth += 1
+
+    def h_levelsum(self, literals):
+        """ The sum of the goal levels, as PlanningGraph.h_levelsum (goals
+        that never enter the graph are not counted)
+        """
+        level, _ = self.levels(literals)
+        return sum(level[goal] for goal in self.goals if level[goal] >= 0)
+
+    def h_maxlevel(self, literals):
+        """ The largest goal level, as PlanningGraph.h_maxlevel (the last level
+        of the graph if some goal never enters it)
+        """
+        if not self.goals:
+            return -1
+        level, depth = self.levels(literals)
+        goal_levels = [level[goal] for goal in self.goals]
+        return depth if min(goal_levels) < 0 else max(goal_levels)
+
+    def h_max(self, literals):
+        """ The cost of the most expensive goal (infinity if one is unreachable) """
+        level, _ = self.levels(literals)
+        goal_levels = [level[goal] for goal in self.goals]
+        if not goal_levels:
+            return 0
+        return infinity if min(goal_levels) < 0 else max(goal_levels)
+
+    def costs(self, literals):
+        """ Return the additive cost of every literal (infinity if unreachable)
+
+        The costs are final in increasing order (Knuth's generalization of
+        Dijkstra's algorithm): an action is applied once the costs of all its
+        preconditions are final, and costs 1 plus their sum.
+        """
+        cost = [infinity] * (2 * len(self.fluents))
+        frontier = []
+        for literal in literals:
+            cost[literal] = 0
+            frontier.append((0, literal))
+        counts = self.counts[:]
+        sums = [0] * len(self.actions)
+        consumers, effects = self.consumers, self.effects
+        for a in self.free:
+            for literal in effects[a]:
+                if 1 < cost[literal]:
+                    cost[literal] = 1
+                    frontier.append((1, literal))
+        heapq.heapify(frontier)
+        while frontier:
+            c, literal = heapq.heappop(frontier)
+            if c > cost[literal]:
+                continue
+            for a in consumers[literal]:
+                sums[a] += c
+                counts[a] -= 1
+                if not counts[a]:
+                    action_cost = sums[a] + 1
+                    for effect in effects[a]:
+                        if action_cost < cost[effect]:
+                            cost[effect] = action_cost
+                            heapq.heappush(frontier, (action_cost, effect))
+        return cost
+
+    def h_add(self, literals):
+        """ The sum of the additive costs of the goals (infinity if one is unreachable) """
+        cost = self.costs(literals)
+        return sum(cost[goal] for goal in self.goals)
+
+    def relaxed_plan(self, literals):
+        """ Extract a relaxed plan for the goals (FF)
+
+        Every goal, and then every precondition of a chosen action, that is
+        not in the root level is achieved by the action that first achieves it
+        in the relaxed planning graph.
+
+        Returns
+        -------
+        list or None
+            The sorted action indices of the relaxed plan, or None if some goal
+            is unreachable
+        """
+        supporters = [None] * (2 * len(self.fluents))
+        level, _ = self.levels(literals, supporters)
+        if any(level[goal] < 0 for goal in self.goals):
+            return None
+        plan, marked = set(), set()
+        agenda = [goal for goal in self.goals if level[goal] > 0]
+        while agenda:
+            literal = agenda.pop()
+            if literal in marked:
+                continue
+            marked.add(literal)
+            a = supporters[literal]
+            if a not in plan:
+                plan.add(a)
+                agenda.extend(p for p in self.preconditions[a] if level[p] > 0)
+        return sorted(plan)
+
+    def helpful(self, plan, literals):
+        """ Return the actions of a relaxed plan that are applicable in the
+        root level (FF's helpful actions)
+        """
+        root = set(literals)
+        return [a for a in plan if all(p in root for p in self.preconditions[a])]
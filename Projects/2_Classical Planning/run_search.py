@@ -1,13 +1,29 @@
 
 import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+
+from multiprocessing.connection import wait
+from timeit import default_timer as timer
 
 from aimacode.search import (breadth_first_search, astar_search,
     breadth_first_tree_search, depth_first_graph_search, uniform_cost_search,
     greedy_best_first_graph_search, depth_limited_search,
-    recursive_best_first_search)
+    recursive_best_first_search, compact_astar_search, lazy_greedy_best_first_search,
+    enforced_hill_climbing)
 from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
+from planning_problem import BitsetPlanningProblem
+
+from _utils import run_search, search_record
 
-from _utils import run_search
+try:
+    import resource
+except ImportError:  # not available on Windows; the memory cap is ignored there
+    resource = None
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -30,6 +46,16 @@ You must either use the -m flag to run in manual mode, or use both the -p and
 choices for each include:
 """
 
+def lazy_greedy_helpful_search(problem, h):
+    """ Lazy greedy best-first search with the helpful actions as preferred operators """
+    return lazy_greedy_best_first_search(problem, h, problem.helpful_actions)
+
+
+def enforced_hill_climbing_helpful(problem, h):
+    """ Enforced hill-climbing restricted to the helpful actions, as in FF """
+    return enforced_hill_climbing(problem, h, problem.helpful_actions)
+
+
 PROBLEMS = [["Air Cargo Problem 1", air_cargo_p1],
             ["Air Cargo Problem 2", air_cargo_p2],
             ["Air Cargo Problem 3", air_cargo_p3],
@@ -44,7 +70,17 @@ SEARCHES = [["breadth_first_search", breadth_first_search, ""],
             ['astar_search', astar_search, 'h_unmet_goals'],
             ['astar_search', astar_search, 'h_pg_levelsum'],
             ['astar_search', astar_search, 'h_pg_maxlevel'],
-            ['astar_search', astar_search, 'h_pg_setlevel']
+            ['astar_search', astar_search, 'h_pg_setlevel'],
+            ['compact_astar_search', compact_astar_search, 'h_unmet_goals'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_add'],
+            ['greedy_best_first_graph_search', greedy_best_first_graph_search, 'h_ff'],
+            ['astar_search', astar_search, 'h_max'],
+            ['astar_search', astar_search, 'h_add'],
+            ['astar_search', astar_search, 'h_ff'],
+            ['lazy_greedy_best_first_search', lazy_greedy_best_first_search, 'h_pg_levelsum'],
+            ['lazy_greedy_best_first_search', lazy_greedy_best_first_search, 'h_ff'],
+            ['lazy_greedy_helpful_search', lazy_greedy_helpful_search, 'h_ff'],
+            ['enforced_hill_climbing', enforced_hill_climbing_helpful, 'h_ff'],
             ]
 
 
@@ -66,7 +102,7 @@ def manual():
         __file__, " ".join(p_choices), " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, bitset=False):
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
 
@@ -76,10 +112,134 @@ def main(p_choices, s_choices):
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
             problem_instance = problem_fn()
+            if bitset:
+                problem_instance = BitsetPlanningProblem(problem_instance)
             heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
             run_search(problem_instance, search_fn, heuristic_fn)
 
 
+RECORD_FIELDS = ['problem', 'search', 'heuristic', 'status', 'actions', 'expansions', 'goal_tests',
+                 'new_nodes', 'plan_length', 'seconds', 'error']
+
+
+def _portfolio_job(conn, p_choice, s_choice, bitset, memory):
+    """ Solve one (problem, search) pair in a worker process and send its record """
+    _, search_fn, heuristic = SEARCHES[s_choice-1]
+    try:
+        if memory and resource is not None:
+            limit = memory * 1024 * 1024
+            try:
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            except (ValueError, OSError) as e:
+                raise ValueError("cannot limit memory to {} MB: {}".format(memory, e)) from None
+        problem_instance = PROBLEMS[p_choice-1][1]()
+        if bitset:
+            problem_instance = BitsetPlanningProblem(problem_instance)
+        heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
+        record = search_record(problem_instance, search_fn, heuristic_fn)
+        record['status'] = 'solved' if record['plan_length'] is not None else 'failed'
+    except MemoryError:
+        record = {'status': 'memory'}
+    except Exception:
+        record = {'status': 'error', 'error': traceback.format_exc(limit=1).strip().splitlines()[-1]}
+    conn.send(record)
+    conn.close()
+
+
+def portfolio(p_choices, s_choices, jobs=None, timeout=None, memory=None, bitset=False):
+    """ Run every (problem, search) pair in its own process, at most `jobs` at a time
+
+    Parameters
+    ----------
+    p_choices, s_choices : list(int)
+        1-based indices into PROBLEMS and SEARCHES
+
+    jobs : int
+        Number of concurrent worker processes (default: one per CPU)
+
+    timeout : float
+        Seconds after which a run is killed and recorded with status 'timeout'
+
+    memory : int
+        Address space limit of each worker in megabytes (Unix only); a run that
+        exceeds it is recorded with status 'memory'
+
+    bitset : bool
+        Solve BitsetPlanningProblem instances (see planning_problem.py)
+
+    Yields
+    ------
+    dict
+        One record per run, in completion order, with the keys in RECORD_FIELDS
+        ('status' is one of 'solved', 'failed', 'timeout', 'memory' or 'error')
+    """
+    pending = [(p, s) for p in map(int, p_choices) for s in map(int, s_choices)]
+    pending.reverse()
+    jobs = jobs or os.cpu_count() or 1
+    running = {}  # connection -> (process, problem index, search index, start time)
+    while pending or running:
+        while pending and len(running) < jobs:
+            p, s = pending.pop()
+            recv, send = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_portfolio_job, args=(send, p, s, bitset, memory))
+            process.start()
+            send.close()
+            running[recv] = (process, p, s, timer())
+        deadline = None
+        if timeout is not None:
+            deadline = max(0, min(start for *_, start in running.values()) + timeout - timer())
+        ready = wait(list(running), deadline)
+        now = timer()
+        for conn, (process, p, s, start) in list(running.items()):
+            # poll before giving up on a run: it may have reported just
+            # before its deadline, after wait() returned
+            if conn in ready or conn.poll():
+                try:
+                    record = conn.recv()
+                except EOFError:  # the worker died without reporting, e.g., killed by the OS
+                    record = {'status': 'memory' if memory else 'error',
+                              'error': 'exit code {}'.format(process.exitcode)}
+            elif timeout is not None and now - start >= timeout:
+                process.terminate()
+                record = {'status': 'timeout', 'seconds': now - start}
+            else:
+                continue
+            process.join()
+            conn.close()
+            del running[conn]
+            sname, _, heuristic = SEARCHES[s-1]
+            record.update(problem=PROBLEMS[p-1][0], search=sname, heuristic=heuristic)
+            yield {field: record.get(field) for field in RECORD_FIELDS}
+
+
+def write_records(records, path):
+    """ Write portfolio records to a .json file, or as CSV to any other path ('-' for stdout)
+
+    Each record is written and flushed as soon as it arrives, so the results
+    of a long portfolio can be followed (and are kept if it is interrupted).
+    A .json file holds an array with one record per line.
+    """
+    f = sys.stdout if path == '-' else open(path, 'w', newline='')
+    try:
+        if path.endswith('.json'):
+            separator = '[\n'
+            for record in records:
+                f.write(separator + json.dumps(record))
+                f.flush()
+                separator = ',\n'
+            f.write('[]\n' if separator == '[\n' else '\n]\n')
+        else:
+            writer = csv.DictWriter(f, RECORD_FIELDS)
+            writer.writeheader()
+            f.flush()
+            for record in records:
+                writer.writerow(record)
+                f.flush()
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
 if __name__=="__main__":
     parser = argparse.ArgumentParser(description="Solve air cargo planning problems " + 
         "using a variety of state space search methods including uninformed, greedy, " +
@@ -90,12 +250,27 @@ if __name__=="__main__":
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
+    parser.add_argument('-b', '--bitset', action="store_true",
+                        help="Pack each state into a single integer (faster, same search results).")
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help="Run the selected problems and searches as a parallel portfolio and write one " +
+                             "record per run to FILE (.json for JSON, otherwise CSV; '-' for CSV on stdout).")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="Number of parallel runs in portfolio mode (default: one per CPU).")
+    parser.add_argument('-t', '--timeout', type=float, default=None,
+                        help="Seconds after which a run is stopped in portfolio mode.")
+    parser.add_argument('--memory', type=int, default=None, metavar='MB',
+                        help="Memory limit of each run in portfolio mode, in megabytes (Unix only).")
     args = parser.parse_args()
 
-    if args.manual:
+    if args.output and args.problems and args.searches:
+        records = portfolio(sorted(set(args.problems)), sorted(set(args.searches)),
+                            args.jobs, args.timeout, args.memory, args.bitset)
+        write_records(records, args.output)
+    elif args.manual:
         manual()
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))), args.bitset)
     else:
         print()
         parser.print_help()
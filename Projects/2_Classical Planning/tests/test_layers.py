@@ -0,0 +1,93 @@
+
+import unittest
+
+from itertools import combinations
+
+from aimacode.utils import expr
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1
+from my_planning_graph import PlanningGraph, ActionLayer, LiteralLayer
+
+
+def reference_mutex(layer, itemA, itemB):
+    """ The pairwise definition of mutexes that update_mutexes computes with bitsets """
+    if isinstance(layer, ActionLayer):
+        if layer._serialize and not itemA.no_op and not itemB.no_op:
+            return True
+        if layer._inconsistent_effects(itemA, itemB) or layer._interference(itemA, itemB):
+            return True
+        return not layer._ignore_mutexes and layer._competing_needs(itemA, itemB)
+    if layer._negation(itemA, itemB):
+        return True
+    return (not layer._ignore_mutexes and len(layer.parent_layer) > 0
+            and layer._inconsistent_support(itemA, itemB))
+
+
+class Test_BitsetMutexes(unittest.TestCase):
+    def test_same_as_pairwise(self):
+        for problem in [have_cake(), air_cargo_p1()]:
+            for serialize in (True, False):
+                for ignore_mutexes in (True, False):
+                    pg = PlanningGraph(problem, problem.initial, serialize, ignore_mutexes).fill(3)
+                    for layer in pg.literal_layers + pg.action_layers:
+                        for itemA, itemB in combinations(layer, 2):
+                            self.assertEqual(layer.is_mutex(itemA, itemB), reference_mutex(layer, itemA, itemB),
+                                             (itemA, itemB, serialize, ignore_mutexes))
+                            self.assertEqual(layer.is_mutex(itemA, itemB), layer.is_mutex(itemB, itemA))
+
+    def test_index_shared_by_problem(self):
+        problem = air_cargo_p1()
+        pg1 = PlanningGraph(problem, problem.initial)
+        pg2 = PlanningGraph(problem, problem.initial, serialize=False)
+        self.assertIs(pg1.literal_layers[0].index, pg2.literal_layers[0].index)
+        pg1.fill()
+        for layer in pg1.literal_layers + pg1.action_layers:
+            self.assertIs(layer.index, pg1.literal_layers[0].index)
+
+
+class Test_LayerSharing(unittest.TestCase):
+    def setUp(self):
+        self.problem = air_cargo_p1()
+        self.pg = PlanningGraph(self.problem, self.problem.initial).fill()
+
+    def test_edges_not_shared_after_change(self):
+        A, B = expr('FakeFluent_A'), expr('FakeFluent_B')
+        first = LiteralLayer([A], ActionLayer())
+        action = next(a for a in self.pg._actionNodes if not a.no_op)
+        first.add_inbound_edges(action, [A])
+        second = LiteralLayer(first, ActionLayer())
+        self.assertIs(second.parents[A], first.parents[A])
+        second.add_inbound_edges(action, [B])
+        other = next(a for a in self.pg._actionNodes if a.no_op)
+        second.add_inbound_edges(other, [A])
+        self.assertEqual(first.parents[A], {action})
+        self.assertNotIn(B, first.parents)
+        self.assertEqual(second.parents[A], {action, other})
+        self.assertEqual(second.parents[B], {action})
+
+    def test_parents_accumulate(self):
+        # every action in an action layer is a parent of its effects in the next literal layer
+        for actions, literals in zip(self.pg.action_layers, self.pg.literal_layers[1:]):
+            for action in actions:
+                for effect in action.effects:
+                    self.assertIn(action, literals.parents[effect])
+
+    def test_mutex_count(self):
+        for layer in self.pg.literal_layers + self.pg.action_layers:
+            self.assertEqual(layer._mutex_count, sum(bin(m).count('1') for m in layer._mutexes.values()))
+            self.assertEqual(layer._mutex_count % 2, 0)
+
+    def test_equality(self):
+        layers = self.pg.literal_layers
+        self.assertEqual(layers[-1], layers[-2])
+        for a, b in zip(layers, layers[1:-1]):
+            self.assertNotEqual(a, b)
+        copy = LiteralLayer(layers[-1], layers[-1].parent_layer)
+        copy.update_mutexes()
+        self.assertEqual(copy, layers[-1])
+        copy.set_mutex(*list(copy)[:2])
+        self.assertEqual(copy == layers[-1], layers[-1].is_mutex(*list(copy)[:2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+
+import random
+import unittest
+
+from aimacode.search import Node, breadth_first_search, astar_search
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from planning_problem import BitsetPlanningProblem, SuccessorGenerator
+
+
+def applicable(problem, state):
+    """ Reference definition: check every action against every fluent """
+    pos = {s for f, s in zip(state, problem.state_map) if f}
+    neg = {s for f, s in zip(state, problem.state_map) if not f}
+    return [a for a in problem.actions_list if a.precond_pos <= pos and a.precond_neg <= neg]
+
+
+class Test_SuccessorGenerator(unittest.TestCase):
+    def test_random_states(self):
+        rng = random.Random(0)
+        for problem in [have_cake(), air_cargo_p2()]:
+            generator = SuccessorGenerator(problem.actions_list, problem.state_map)
+            bitset = BitsetPlanningProblem(problem)
+            for _ in range(200):
+                state = tuple(rng.random() < 0.3 for _ in problem.state_map)
+                expected = applicable(problem, state)
+                self.assertEqual([problem.actions_list[k] for k in generator.applicable(state)], expected)
+                self.assertEqual(problem.actions(state), expected)
+                self.assertEqual(bitset.actions(bitset.encode(state)), expected)
+
+    def test_rebuilt_with_actions_list(self):
+        problem = have_cake()
+        self.assertEqual(len(problem.actions(problem.initial)), 1)
+        problem.actions_list = problem.actions_list[1:]
+        self.assertEqual(problem.actions(problem.initial), [])
+
+
+class Test_BitsetPlanningProblem(unittest.TestCase):
+    def setUp(self):
+        self.problem = air_cargo_p1()
+        self.bitset = BitsetPlanningProblem(self.problem)
+
+    def test_encoding_roundtrip(self):
+        self.assertEqual(self.bitset.decode(self.bitset.initial), self.problem.initial)
+        self.assertEqual(self.bitset.encode(self.problem.initial), self.bitset.initial)
+
+    def test_states_compare_like_tuples(self):
+        states = [self.problem.initial]
+        for action in self.problem.actions(self.problem.initial):
+            states.append(self.problem.result(self.problem.initial, action))
+        self.assertEqual(sorted(map(self.bitset.encode, states)),
+                         list(map(self.bitset.encode, sorted(states))))
+
+    def test_successors_match(self):
+        frontier, seen = [self.problem.initial], {self.problem.initial}
+        while frontier:
+            state = frontier.pop()
+            bits = self.bitset.encode(state)
+            actions = self.problem.actions(state)
+            self.assertEqual(self.bitset.actions(bits), actions)
+            self.assertEqual(self.bitset.goal_test(bits), self.problem.goal_test(state))
+            for action in actions:
+                child = self.problem.result(state, action)
+                self.assertEqual(self.bitset.result(bits, action), self.bitset.encode(child))
+                if child not in seen and len(seen) < 500:
+                    seen.add(child)
+                    frontier.append(child)
+
+    def test_heuristics_match(self):
+        state = self.problem.initial
+        for name in ['h_unmet_goals', 'h_pg_levelsum', 'h_pg_maxlevel', 'h_pg_setlevel']:
+            self.assertEqual(getattr(self.bitset, name)(Node(self.bitset.initial)),
+                             getattr(self.problem, name)(Node(state)), name)
+
+    def test_same_search(self):
+        for problem in [have_cake(), air_cargo_p1()]:
+            bitset = BitsetPlanningProblem(problem)
+            for search in [breadth_first_search,
+                           lambda p: astar_search(p, p.h_unmet_goals)]:
+                expected = search(problem)
+                node = search(bitset)
+                self.assertEqual([str(a) for a in node.solution()], [str(a) for a in expected.solution()])
+                self.assertEqual(bitset.decode(node.state), expected.state)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+
+import random
+import unittest
+
+from aimacode.planning import Action
+from aimacode.search import Node
+from aimacode.utils import expr
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from my_planning_graph import PlanningGraph
+from planning_problem import BitsetPlanningProblem
+from relaxed_graph import RelaxedPlanningGraph, infinity
+
+
+def additive_costs(graph, literals):
+    """ Reference h_add costs: iterate the cost equations to their fixpoint """
+    cost = [infinity] * (2 * len(graph.fluents))
+    for literal in literals:
+        cost[literal] = 0
+    changed = True
+    while changed:
+        changed = False
+        for pre, eff in zip(graph.preconditions, graph.effects):
+            action_cost = 1 + sum(cost[p] for p in pre)
+            for e in eff:
+                if action_cost < cost[e]:
+                    cost[e], changed = action_cost, True
+    return cost
+
+
+class Test_RelaxedPlanningGraph(unittest.TestCase):
+    def assertSameHeuristics(self, problem, state, msg=None):
+        graph = RelaxedPlanningGraph(problem)
+        literals = graph.state_literals(state)
+        pg = PlanningGraph(problem, state, serialize=True, ignore_mutexes=True)
+        self.assertEqual(graph.h_levelsum(literals), pg.h_levelsum(), msg)
+        pg = PlanningGraph(problem, state, serialize=True, ignore_mutexes=True)
+        self.assertEqual(graph.h_maxlevel(literals), pg.h_maxlevel(), msg)
+
+    def test_random_states(self):
+        rng = random.Random(0)
+        for problem in [have_cake(), air_cargo_p1(), air_cargo_p2()]:
+            self.assertSameHeuristics(problem, problem.initial)
+            for _ in range(10):
+                state = tuple(rng.random() < 0.2 for _ in problem.state_map)
+                self.assertSameHeuristics(problem, state, state)
+
+    def test_unreachable_goal(self):
+        # without Bake(Cake), Have(Cake) can not be reached once eaten
+        problem = have_cake()
+        problem.actions_list = problem.actions_list[:1]
+        self.assertSameHeuristics(problem, (False, True))
+        self.assertSameHeuristics(problem, (True, False))
+
+    def test_levels(self):
+        problem = air_cargo_p1()
+        graph = RelaxedPlanningGraph(problem)
+        level, depth = graph.levels(graph.state_literals(problem.initial))
+        at = {str(fluent): level[2 * i] for i, fluent in enumerate(graph.fluents)}
+        self.assertEqual(at['At(C1, SFO)'], 0)
+        self.assertEqual(at['In(C1, P1)'], 1)
+        self.assertEqual(at['At(C1, JFK)'], 2)
+        self.assertEqual(depth, 2)
+
+    def test_problem_heuristics(self):
+        problem = air_cargo_p2()
+        graph = problem.relaxed_graph
+        self.assertIs(problem.relaxed_graph, graph)
+        problem.actions_list = problem.actions_list + [
+            Action(expr('Noop()'), [[], []], [[], []])]
+        self.assertIsNot(problem.relaxed_graph, graph)
+
+
+class Test_RelaxationHeuristics(unittest.TestCase):
+    def states(self, problem, n=10, seed=0):
+        rng = random.Random(seed)
+        yield problem.initial
+        for _ in range(n):
+            yield tuple(rng.random() < 0.2 for _ in problem.state_map)
+
+    def test_costs(self):
+        for problem in [have_cake(), air_cargo_p1(), air_cargo_p2()]:
+            graph = RelaxedPlanningGraph(problem)
+            for state in self.states(problem):
+                literals = graph.state_literals(state)
+                expected = additive_costs(graph, literals)
+                self.assertEqual(graph.costs(literals), expected)
+                self.assertEqual(graph.h_add(literals), sum(expected[g] for g in graph.goals))
+                level, _ = graph.levels(literals)
+                self.assertEqual(graph.h_max(literals),
+                                 max(level[g] if level[g] >= 0 else infinity for g in graph.goals))
+
+    def test_relaxed_plan(self):
+        for problem in [have_cake(), air_cargo_p1(), air_cargo_p2()]:
+            graph = RelaxedPlanningGraph(problem)
+            for state in self.states(problem):
+                literals = graph.state_literals(state)
+                plan = graph.relaxed_plan(literals)
+                if plan is None:
+                    self.assertEqual(graph.h_max(literals), infinity)
+                    continue
+                # the plan solves the delete relaxation when its actions are applied as soon as possible
+                reached, todo = set(literals), list(plan)
+                while todo:
+                    ready = [a for a in todo if all(p in reached for p in graph.preconditions[a])]
+                    self.assertTrue(ready, "relaxed plan is stuck")
+                    for a in ready:
+                        reached.update(graph.effects[a])
+                        todo.remove(a)
+                self.assertTrue(all(g in reached for g in graph.goals))
+                self.assertGreaterEqual(len(plan), graph.h_max(literals))
+                self.assertLessEqual(len(plan), graph.h_add(literals))
+                for a in graph.helpful(plan, literals):
+                    self.assertIn(a, plan)
+                    self.assertIn(problem.actions_list[a], problem.actions(state))
+
+    def test_unreachable(self):
+        problem = have_cake()
+        problem.actions_list = [a for a in problem.actions_list if a.name == 'Bake']
+        node = Node((False, False))  # the cake can be baked, but never eaten
+        self.assertEqual(problem.h_max(node), infinity)
+        self.assertEqual(problem.h_add(node), infinity)
+        self.assertEqual(problem.h_ff(node), infinity)
+        self.assertEqual(problem.helpful_actions(node), [])
+
+    def test_problem_heuristics(self):
+        problem = air_cargo_p1()
+        bitset = BitsetPlanningProblem(problem)
+        node, bits = Node(problem.initial), Node(bitset.initial)
+        self.assertEqual(problem.h_max(node), problem.h_pg_maxlevel(node))
+        for name in ['h_max', 'h_add', 'h_ff', 'helpful_actions']:
+            self.assertEqual(getattr(problem, name)(node), getattr(bitset, name)(bits), name)
+        self.assertEqual(problem.h_ff(node), 6)
+        self.assertEqual(sorted(a.name for a in problem.helpful_actions(node)), ["Fly", "Fly", "Load", "Load"])
+
+    def test_separate_caches(self):
+        problem = air_cargo_p1()
+        bitset = BitsetPlanningProblem(problem)
+        for name in ['h_pg_levelsum', 'h_pg_maxlevel', 'h_max', 'h_add', 'h_ff', '_relaxed_plan']:
+            base, packed = getattr(type(problem), name), getattr(BitsetPlanningProblem, name)
+            self.assertIsNot(base, packed, name)
+            before = base.cache_info()
+            getattr(bitset, name)(Node(bitset.initial))
+            self.assertEqual(base.cache_info(), before, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
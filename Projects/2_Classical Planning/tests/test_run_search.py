@@ -0,0 +1,85 @@
+
+import csv
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import run_search
+from run_search import portfolio, write_records, RECORD_FIELDS
+
+
+class Test_Portfolio(unittest.TestCase):
+    def test_records(self):
+        records = sorted(portfolio([1], [1, 4], jobs=2, bitset=True), key=lambda r: r['search'])
+        self.assertEqual([r['search'] for r in records], ['breadth_first_search', 'greedy_best_first_graph_search'])
+        for record in records:
+            self.assertEqual(list(record), RECORD_FIELDS)
+            self.assertEqual(record['status'], 'solved')
+            self.assertEqual(record['problem'], 'Air Cargo Problem 1')
+            self.assertEqual(record['actions'], 20)
+            self.assertEqual(record['plan_length'], 6)
+        self.assertEqual(records[1]['heuristic'], 'h_unmet_goals')
+
+    def test_timeout(self):
+        record, = portfolio([2], [10], jobs=1, timeout=0.2)
+        self.assertEqual(record['status'], 'timeout')
+        self.assertIsNone(record['plan_length'])
+
+    @unittest.skipIf(run_search.resource is None, "memory limits need the resource module")
+    def test_bad_memory_limit(self):
+        # the worker reports the failure instead of dying without a record
+        with mock.patch('resource.setrlimit', side_effect=ValueError('not allowed')):
+            record, = portfolio([1], [1], jobs=1, memory=1)
+        self.assertEqual(record['status'], 'error')
+        self.assertIn('cannot limit memory to 1 MB', record['error'])
+
+    def test_reported_before_deadline(self):
+        # wait() misses the report and only returns at the deadline
+        def late_wait(connections, timeout):
+            time.sleep(timeout)
+            return []
+
+        with mock.patch('run_search.wait', late_wait):
+            record, = portfolio([1], [1], jobs=1, timeout=1)
+        self.assertEqual(record['status'], 'solved')
+
+    def test_write_records(self):
+        records = list(portfolio([1], [1], jobs=1))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'runs.json')
+            write_records(records, path)
+            with open(path) as f:
+                self.assertEqual(json.load(f), records)
+            path = os.path.join(tmp, 'runs.csv')
+            write_records(records, path)
+            with open(path, newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]['expansions'], str(records[0]['expansions']))
+            write_records([], path + '.json')
+            with open(path + '.json') as f:
+                self.assertEqual(json.load(f), [])
+
+    def test_write_records_streams(self):
+        records = list(portfolio([1], [1, 4], jobs=1))
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ('runs.json', 'runs.csv'):
+                path = os.path.join(tmp, name)
+
+                def produce():
+                    for record in records:
+                        yield record
+                        # the record was written before the next one is asked for
+                        with open(path) as f:
+                            self.assertIn(record['search'], f.read())
+
+                write_records(produce(), path)
+            with open(path.replace('.csv', '.json')) as f:
+                self.assertEqual(json.load(f), records)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+
+import unittest
+
+from aimacode.search import (Problem, Node, InstrumentedProblem, uniform_cost_search,
+    astar_search, compact_astar_search, greedy_best_first_graph_search,
+    lazy_greedy_best_first_search, enforced_hill_climbing)
+from aimacode.utils import PriorityQueue
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from planning_problem import BitsetPlanningProblem
+from run_search import SEARCHES
+
+
+class GraphProblem(Problem):
+    """ Shortest path on a weighted directed graph {node: {neighbor: cost}} """
+    def __init__(self, graph, initial, goal):
+        super().__init__(initial, goal)
+        self.graph = graph
+
+    def actions(self, state):
+        return sorted(self.graph.get(state, {}))
+
+    def result(self, state, action):
+        return action
+
+    def path_cost(self, c, state1, action, state2):
+        return c + self.graph[state1][state2]
+
+
+class CountingHeuristic:
+    """ Wrap a heuristic and count its evaluations """
+    def __init__(self, h):
+        self.h = h
+        self.calls = 0
+
+    def __call__(self, node):
+        self.calls += 1
+        return self.h(node)
+
+
+def check_plan(test, problem, node):
+    state = problem.initial
+    for action in node.solution():
+        test.assertIn(action, problem.actions(state))
+        state = problem.result(state, action)
+    test.assertTrue(problem.goal_test(state))
+
+
+class Test_PriorityQueue(unittest.TestCase):
+    def test_order(self):
+        pq = PriorityQueue(min, lambda x: -x)
+        for x in [3, 1, 4, 5, 9, 2, 6]:
+            pq.append(x)
+        self.assertEqual([pq.pop() for _ in range(len(pq))], [9, 6, 5, 4, 3, 2, 1])
+
+    def test_decrease_key(self):
+        pq = PriorityQueue(min, lambda node: node.path_cost)
+        incumbent = Node('B', path_cost=10)
+        pq.append(Node('A', path_cost=5))
+        pq.append(incumbent)
+        better = Node('B', path_cost=1)
+        self.assertIs(pq[better], incumbent)
+        del pq[incumbent]
+        pq.append(better)
+        self.assertEqual(len(pq), 2)
+        self.assertIs(pq.pop(), better)
+        self.assertEqual(pq.pop().state, 'A')
+        self.assertEqual(len(pq), 0)
+        self.assertNotIn(better, pq)
+        stats = pq.stats()
+        self.assertEqual((stats['pushes'], stats['deletions'], stats['max_size']), (3, 1, 2))
+        self.assertEqual((stats['size'], stats['heap_size'], stats['skipped']), (0, 1, 0))
+
+    def test_append_keeps_lower_key(self):
+        pq = PriorityQueue(min, lambda node: node.path_cost)
+        queued = Node('B', path_cost=5)
+        pq.append(queued)
+        pq.append(Node('B', path_cost=7))
+        self.assertIs(pq[queued], queued)
+        better = Node('B', path_cost=2)
+        pq.append(better)
+        self.assertIs(pq[queued], better)
+        self.assertEqual(len(pq), 1)
+        self.assertIs(pq.pop(), better)
+        self.assertEqual(len(pq), 0)
+
+    def test_compaction(self):
+        pq = PriorityQueue()
+        for i in range(100):
+            pq.append(i)
+        for i in range(90):
+            del pq[i]
+        self.assertLess(pq.stats()['heap_size'], 100)
+        self.assertEqual([pq.pop() for _ in range(len(pq))], list(range(90, 100)))
+
+
+class Test_BestFirstGraphSearch(unittest.TestCase):
+    def test_better_path_replaces_incumbent(self):
+        # G is first queued through the expensive edge A -> G; the cheaper
+        # path through B must replace it before G is popped
+        graph = {'S': {'A': 1, 'B': 2}, 'A': {'G': 10}, 'B': {'G': 2}}
+        node = uniform_cost_search(GraphProblem(graph, 'S', 'G'))
+        self.assertEqual(node.path_cost, 4)
+        self.assertEqual(node.solution(), ['B', 'G'])
+
+
+class Test_CompactAstarSearch(unittest.TestCase):
+    def test_better_path(self):
+        graph = {'S': {'A': 1, 'B': 2}, 'A': {'G': 10}, 'B': {'G': 2}}
+        node = compact_astar_search(GraphProblem(graph, 'S', 'G'), lambda node: 0)
+        self.assertEqual(node.path_cost, 4)
+        self.assertEqual(node.solution(), ['B', 'G'])
+        self.assertEqual([n.state for n in node.path()], ['S', 'B', 'G'])
+
+    def test_unreachable(self):
+        graph = {'S': {'A': 1}}
+        self.assertIsNone(compact_astar_search(GraphProblem(graph, 'S', 'G'), lambda node: 0))
+
+    def test_same_expansions_as_astar(self):
+        results = []
+        for search in [astar_search, compact_astar_search]:
+            problem = InstrumentedProblem(BitsetPlanningProblem(air_cargo_p1()))
+            node = search(problem, problem.h_unmet_goals)
+            results.append((problem.succs, problem.goal_tests, problem.states,
+                            node.path_cost, [str(a) for a in node.solution()]))
+        self.assertEqual(results[0], results[1])
+
+
+class Test_LocalSearches(unittest.TestCase):
+    def test_lazy_evaluates_fewer_nodes(self):
+        calls = []
+        for search in [greedy_best_first_graph_search, lazy_greedy_best_first_search]:
+            problem = BitsetPlanningProblem(air_cargo_p2())
+            h = CountingHeuristic(problem.h_pg_levelsum)
+            node = search(problem, h)
+            check_plan(self, problem, node)
+            calls.append(h.calls)
+        self.assertLess(calls[1], calls[0])
+
+    def test_lazy_evaluates_popped_states_once(self):
+        problem = InstrumentedProblem(BitsetPlanningProblem(air_cargo_p1()))
+        h = CountingHeuristic(problem.h_unmet_goals)
+        lazy_greedy_best_first_search(problem, h)
+        self.assertEqual(h.calls, problem.succs)
+
+    def test_preferred_operators(self):
+        problem = BitsetPlanningProblem(air_cargo_p1())
+        for preferred in [problem.helpful_actions, lambda node: []]:
+            node = lazy_greedy_best_first_search(problem, problem.h_ff, preferred)
+            check_plan(self, problem, node)
+
+    def test_enforced_hill_climbing(self):
+        problem = BitsetPlanningProblem(air_cargo_p1())
+        for preferred in [None, problem.helpful_actions, lambda node: []]:
+            node = enforced_hill_climbing(problem, problem.h_ff, preferred)
+            check_plan(self, problem, node)
+
+    def test_helpful_search_same_expansions(self):
+        # search 20: the preferred successors are queued in a fixed order, so
+        # both encodings (and every run) expand the same nodes
+        name, search, heuristic = SEARCHES[19]
+        self.assertEqual(name, 'lazy_greedy_helpful_search')
+        for problem_fn in [air_cargo_p1, air_cargo_p2]:
+            expansions = []
+            for problem in [problem_fn(), BitsetPlanningProblem(problem_fn())]:
+                problem = InstrumentedProblem(problem)
+                node = search(problem, getattr(problem, heuristic))
+                check_plan(self, problem, node)
+                expansions.append((problem.succs, problem.states, len(node.solution())))
+            self.assertEqual(expansions[0], expansions[1], problem_fn.__name__)
+
+    def test_unreachable(self):
+        graph = {'S': {'A': 1}, 'A': {'B': 1}}
+        problem = GraphProblem(graph, 'S', 'G')
+        self.assertIsNone(lazy_greedy_best_first_search(problem, lambda node: 1))
+        self.assertIsNone(enforced_hill_climbing(problem, lambda node: 1))
+        # a dead end is pruned without being expanded
+        problem = InstrumentedProblem(problem)
+        self.assertIsNone(lazy_greedy_best_first_search(problem, lambda node: float('inf')))
+        self.assertEqual(problem.succs, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()